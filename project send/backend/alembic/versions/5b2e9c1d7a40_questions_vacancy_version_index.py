@@ -0,0 +1,33 @@
+"""questions vacancy_id + version index
+
+Revision ID: 5b2e9c1d7a40
+Revises: 01d883cc338a
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c1d7a40'
+down_revision: Union[str, Sequence[str], None] = '01d883cc338a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_questions_vacancy_id_version',
+        'questions',
+        ['vacancy_id', 'version'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_questions_vacancy_id_version', table_name='questions')
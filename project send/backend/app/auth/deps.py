@@ -11,10 +11,13 @@ from app.auth.jwt import decode_token
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+class TokenUser:
+    # пользователь, известный только по подписанному access-токену
+    def __init__(self, user_id: uuid.UUID):
+        self.id = user_id
+
+
+def _access_token_user_id(credentials: HTTPAuthorizationCredentials) -> uuid.UUID:
     if credentials.scheme.lower() != "bearer":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,13 +30,28 @@ async def get_current_user(
         payload = decode_token(token)
         if payload.get("type") != "access":
             raise ValueError
-        user_id = uuid.UUID(payload["sub"])
+        return uuid.UUID(payload["sub"])
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
 
+
+async def get_current_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> TokenUser:
+    # для роутов, которым нужен только id (чаты в Mongo):
+    # без запроса в Postgres и без сессии из пула
+    return TokenUser(_access_token_user_id(credentials))
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    user_id = _access_token_user_id(credentials)
+
     result = await db.execute(
         select(User).where(User.id == user_id)
     )
@@ -45,4 +63,4 @@ async def get_current_user(
             detail="User not found",
         )
 
-    return user
\ No newline at end of file
+    return user
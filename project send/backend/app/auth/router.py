@@ -6,12 +6,24 @@ from app.db.postgres import get_db
 from app.auth.passwords import validate_password
 from app.users.models import User
 from app.auth.schemas import RegisterRequest, LoginRequest, TokenResponse
-from app.auth.security import hash_password, verify_password
+from app.auth.security import (
+    PasswordHasherBusy,
+    hash_password_async,
+    verify_and_update_async,
+)
 from app.auth.jwt import create_access_token, create_refresh_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, try again later",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=TokenResponse)
 async def register(
     data: RegisterRequest,
@@ -33,9 +45,14 @@ async def register(
             detail="Username already exists",
         )
 
+    try:
+        password_hash = await hash_password_async(data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
     user = User(
         username=data.username,
-        password_hash=hash_password(data.password),
+        password_hash=password_hash,
         preferred_language=data.preferred_language,
     )
     db.add(user)
@@ -58,12 +75,31 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(data.password, user.password_hash):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials",
+        )
+
+    try:
+        valid, new_hash = await verify_and_update_async(
+            data.password,
+            user.password_hash,
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
 
+    # параметры Argon2 поменялись — тихо пересчитываем хэш
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     return TokenResponse(
         access_token=create_access_token(user.id),
         refresh_token=create_refresh_token(user.id),
@@ -1,9 +1,32 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
+T = TypeVar("T")
+
 pwd_context = CryptContext(
     schemes=["argon2"],
     deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# argon2 отпускает GIL, поэтому потоки реально считают параллельно,
+# а event loop тем временем обслуживает чаты
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="argon2",
 )
+_pending = 0
+
+
+class PasswordHasherBusy(Exception):
+    pass
 
 
 def hash_password(password: str) -> str:
@@ -11,4 +34,31 @@ def hash_password(password: str) -> str:
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
\ No newline at end of file
+    return pwd_context.verify(password, password_hash)
+
+
+async def _run(fn: Callable[..., T], *args) -> T:
+    global _pending
+
+    # не копим бесконечную очередь при шторме логинов
+    if _pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE:
+        raise PasswordHasherBusy("Too many password operations in progress")
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_and_update_async(
+    password: str,
+    password_hash: str,
+) -> tuple[bool, str | None]:
+    # второй элемент — новый хэш, если параметры Argon2 поменялись
+    return await _run(pwd_context.verify_and_update, password, password_hash)
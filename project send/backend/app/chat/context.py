@@ -0,0 +1,48 @@
+from app.chat.history import build_history, format_messages
+from app.llm.client import MODEL
+from app.llm.config import MAX_CONTEXT_TOKENS
+from app.llm.prompts import chat_turn_prompt, chat_continue_prompt
+
+
+def context_is_fresh(chat: dict) -> bool:
+    context = chat.get("llm_context")
+    if not context:
+        return False
+
+    # модель сменилась — токены чужого словаря
+    if chat.get("llm_context_model") != MODEL:
+        return False
+
+    # контекст упёрся в окно модели, дальше Ollama начнёт его обрезать
+    if len(context) >= MAX_CONTEXT_TOKENS:
+        return False
+
+    # историю почистили (retry-mistakes) — контекст описывает другой диалог
+    covered = chat.get("llm_context_messages", 0)
+    return covered <= len(chat.get("messages", []))
+
+
+def turn_question(chat: dict, answered: bool) -> str | None:
+    # ответ засчитан — интервьюер переходит к следующему вопросу банка,
+    # иначе остаётся на текущем: задаётся ровно тот вопрос, что потом оценим
+    question = chat.get("next_question") if answered else chat.get("question")
+    return question["text"] if question else None
+
+
+def build_turn_prompt(
+    chat: dict,
+    user_text: str,
+    answered: bool = False,
+) -> tuple[str, list[int] | None]:
+    messages = chat.get("messages", [])
+    question = turn_question(chat, answered)
+
+    if context_is_fresh(chat):
+        # досылаем только то, чего модель ещё не видела:
+        # подсказки/ответы, добавленные мимо context, и новую реплику
+        missed = messages[chat.get("llm_context_messages", 0):]
+        prompt = chat_continue_prompt(format_messages(missed), user_text, question)
+        return prompt, chat["llm_context"]
+
+    # context протух — начинаем заново с ограниченного окна истории
+    return chat_turn_prompt(build_history(chat, "interview"), user_text, question), None
@@ -0,0 +1,144 @@
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.chat.history import build_history
+from app.chat.repository import (
+    get_chat_question,
+    get_chat_questions,
+    get_transcript,
+    save_answer,
+    save_answer_score,
+    save_evaluation,
+)
+from app.chat.service import evaluate_answer, evaluate_chat
+from app.chat.speculative import speculation
+from app.core.config import settings
+from app.jobs.queue import enqueue
+
+logger = logging.getLogger("app.chat")
+
+EVALUATE_CHAT = "evaluate_chat"
+
+# служебные реплики, которые фронтенд шлёт обычным сообщением
+CONTROL_MESSAGES = ("дай подсказку", "дай идеальный ответ", "заверши интервью")
+MIN_ANSWER_WORDS = 3
+
+
+def is_answer(text: str, flag: bool | None = None) -> bool:
+    if flag is not None:
+        return flag
+
+    normalized = " ".join(text.lower().split())
+    if normalized.startswith(CONTROL_MESSAGES):
+        return False
+    # встречный вопрос или короткая реплика («ок», «не знаю») — не ответ
+    if normalized.endswith("?"):
+        return False
+    return len(normalized.split()) >= MIN_ANSWER_WORDS
+
+
+def answered_questions(questions: list[dict]) -> list[dict]:
+    return [q for q in questions if q.get("answer")]
+
+
+def pending_questions(questions: list[dict]) -> list[dict]:
+    return [q for q in answered_questions(questions) if q.get("score") is None]
+
+
+def aggregate_evaluation(questions: list[dict]) -> list[dict]:
+    return [
+        {
+            "question_id": q["question_id"],
+            "question": q["text"],
+            "score": q["score"],
+            "feedback": q.get("feedback") or "",
+        }
+        for q in answered_questions(questions)
+        if q.get("score") is not None
+    ]
+
+
+async def _score(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    index: int,
+    question: dict,
+    answer: str,
+    user_id: str,
+):
+    result = await evaluate_answer(question["text"], answer, user_id=user_id)
+    await save_answer_score(
+        mongo,
+        chat_id,
+        index,
+        question["question_id"],
+        answer,
+        result["score"],
+        result["feedback"],
+    )
+
+
+async def score_answer(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    question: dict,
+    answer: str,
+    user_id: str,
+):
+    # ответ фиксируем до вызова LLM: если оценка не удастся,
+    # её доделает задача оценки при завершении интервью
+    index = question["index"]
+    await save_answer(mongo, chat_id, index, question["question_id"], answer)
+    if speculation.enabled:
+        current = await get_chat_question(mongo, chat_id, user_id)
+        if current and not current["finished"]:
+            speculation.schedule(mongo, chat_id, current["question"])
+
+    try:
+        await _score(mongo, chat_id, index, question, answer, user_id)
+    except Exception:
+        logger.exception("Scoring answer for chat %s failed", chat_id)
+
+
+async def enqueue_evaluation(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    user_id: str,
+) -> dict:
+    return await enqueue(
+        mongo,
+        EVALUATE_CHAT,
+        {"chat_id": chat_id, "user_id": user_id},
+        user_id=user_id,
+        # двойной клик по «Завершить» не ставит вторую оценку
+        dedupe_key=f"{EVALUATE_CHAT}:{chat_id}",
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+async def run_evaluation(mongo: AsyncIOMotorDatabase, payload: dict) -> list[dict]:
+    chat_id = payload["chat_id"]
+    user_id = payload["user_id"]
+
+    chat = await get_chat_questions(mongo, chat_id, user_id)
+    if not chat:
+        raise ValueError(f"Chat {chat_id} not found")
+
+    if answered_questions(chat["questions"]):
+        # дооцениваем только ответы, которые не успели оценить по ходу интервью
+        positions = chat["question_positions"]
+        for question in pending_questions(chat["questions"]):
+            index = positions[question["question_id"]]
+            await _score(mongo, chat_id, index, question, question["answer"], user_id)
+
+        chat = await get_chat_questions(mongo, chat_id, user_id)
+        evaluation = aggregate_evaluation(chat["questions"])
+    else:
+        # чат без привязки к вопросам — оцениваем переписку целиком
+        transcript = await get_transcript(mongo, chat_id, user_id)
+        history = build_history(transcript, "evaluation")
+        evaluation = await evaluate_chat(history, user_id=user_id)
+
+    await save_evaluation(mongo, chat_id, evaluation, chat["questions"])
+    return evaluation
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.llm.client import qwen_client
+from app.llm.prompts import interview_greeting
+from app.llm.scheduler import Priority
+
+logger = logging.getLogger("app.chat")
+
+GREETING_POOL_REQUESTS = Counter(
+    "greeting_pool_requests_total",
+    "Greetings served from the pre-generated pool",
+    ["result"],
+)
+
+
+async def generate_greeting_variant(vacancy_title: str) -> str:
+    # мимо кэша и с высокой температурой — иначе все варианты совпадут
+    data = await qwen_client.generate_raw(
+        interview_greeting(vacancy_title),
+        temperature=settings.GREETING_POOL_TEMPERATURE,
+        priority=Priority.BATCH,
+        tag="greeting_pool",
+    )
+    return (data.get("response") or "").strip()
+
+
+class GreetingPool:
+    def __init__(
+        self,
+        size: int,
+        low_watermark: int,
+        generate: Callable[[str], Awaitable[str]] = generate_greeting_variant,
+    ):
+        self.size = size
+        self.low_watermark = low_watermark
+        self.generate = generate
+
+        self._pools: dict[str, deque[str]] = {}
+        self._refills: dict[str, asyncio.Task] = {}
+
+    def available(self, vacancy_title: str) -> int:
+        return len(self._pools.get(vacancy_title, ()))
+
+    def take(self, vacancy_title: str) -> str | None:
+        pool = self._pools.setdefault(vacancy_title, deque())
+
+        # каждый вариант отдаём один раз — новые чаты не видят повторов
+        greeting = pool.popleft() if pool else None
+        GREETING_POOL_REQUESTS.labels("hit" if greeting else "miss").inc()
+
+        if len(pool) < self.low_watermark:
+            self.refill(vacancy_title)
+        return greeting
+
+    def refill(self, vacancy_title: str):
+        task = self._refills.get(vacancy_title)
+        if task and not task.done():
+            return
+        self._refills[vacancy_title] = asyncio.create_task(self._fill(vacancy_title))
+
+    async def _fill(self, vacancy_title: str):
+        pool = self._pools.setdefault(vacancy_title, deque())
+        failures = 0
+
+        while len(pool) < self.size and failures < self.size:
+            try:
+                greeting = await self.generate(vacancy_title)
+            except Exception:
+                logger.exception("Greeting pool refill for %s failed", vacancy_title)
+                return
+
+            if not greeting or greeting in pool:
+                failures += 1
+                continue
+            pool.append(greeting)
+
+    def warm(self, vacancy_titles: list[str]):
+        for title in vacancy_titles:
+            self.refill(title)
+
+    async def aclose(self):
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+
+
+greeting_pool = GreetingPool(
+    size=settings.GREETING_POOL_SIZE,
+    low_watermark=settings.GREETING_POOL_LOW_WATERMARK,
+)
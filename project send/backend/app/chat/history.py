@@ -0,0 +1,120 @@
+import logging
+import re
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.llm.client import qwen_client
+from app.llm.config import HISTORY_BUDGETS, SUMMARY_REFRESH_MESSAGES
+from app.llm.prompts import summary_prompt
+from app.llm.scheduler import Priority
+
+logger = logging.getLogger("app.chat")
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# чаты, для которых summary уже пересчитывается
+_refreshing: set[str] = set()
+
+
+def count_tokens(text: str) -> int:
+    # грубая оценка без токенизатора модели: слова и знаки препинания
+    return len(TOKEN_RE.findall(text))
+
+
+def format_messages(messages: list[dict]) -> str:
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+def _summary(chat: dict) -> tuple[str, int]:
+    summary = chat.get("history_summary") or {}
+    covered = summary.get("covered", 0)
+
+    # историю обнулили — конспект описывает другой диалог
+    if covered > len(chat.get("messages", [])):
+        return "", 0
+    return summary.get("text", ""), covered
+
+
+def _window_start(messages: list[dict], kind: str) -> int:
+    keep = HISTORY_BUDGETS[kind]["keep_turns"] * 2
+    return max(len(messages) - keep, 0)
+
+
+def build_history(chat: dict, kind: str) -> str:
+    budget = HISTORY_BUDGETS[kind]
+    messages = chat.get("messages", [])
+
+    start = _window_start(messages, kind)
+    summary, covered = _summary(chat)
+
+    if start == 0:
+        # вся история помещается в окно дословно
+        summary = ""
+        recent = messages
+    else:
+        # то, что ещё не успело попасть в конспект, идёт дословно
+        recent = messages[min(covered, start):]
+
+    header = f"Краткое содержание начала:\n{summary}\n" if summary else ""
+    limit = budget["max_tokens"] - count_tokens(header)
+
+    lines = [f"{m['role']}: {m['content']}" for m in recent]
+    sizes = [count_tokens(line) for line in lines]
+    total = sum(sizes)
+
+    # режем самые старые реплики, пока не влезем в бюджет
+    drop = 0
+    while drop < len(lines) - 1 and total > limit:
+        total -= sizes[drop]
+        drop += 1
+
+    return header + "\n".join(lines[drop:])
+
+
+def needs_summary(chat: dict) -> bool:
+    messages = chat.get("messages", [])
+    _, covered = _summary(chat)
+    return _window_start(messages, "interview") - covered >= SUMMARY_REFRESH_MESSAGES
+
+
+async def refresh_summary(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    chat: dict,
+):
+    if chat_id in _refreshing:
+        return
+    _refreshing.add(chat_id)
+
+    try:
+        messages = chat.get("messages", [])
+        summary, covered = _summary(chat)
+        upto = _window_start(messages, "interview")
+
+        data = await qwen_client.generate_raw(
+            summary_prompt(summary, format_messages(messages[covered:upto])),
+            priority=Priority.BATCH,
+            tag="summary",
+        )
+        text = (data.get("response") or "").strip()
+        # пустой ответ — оставляем старый конспект, пересчитаем на следующем ходу
+        if not text:
+            return
+
+        # не затираем конспект, если его уже успели продвинуть дальше
+        await mongo.chats.update_one(
+            {
+                "_id": ObjectId(chat_id),
+                "$or": [
+                    {"history_summary.covered": {"$lt": upto}},
+                    {"history_summary": {"$exists": False}},
+                ],
+            },
+            {"$set": {"history_summary": {"text": text, "covered": upto}}},
+        )
+    except Exception:
+        # фоновая задача: ошибка LLM или очереди не должна ронять ответ кандидату
+        logger.exception("Summary refresh for chat %s failed", chat_id)
+    finally:
+        _refreshing.discard(chat_id)
@@ -0,0 +1,72 @@
+"""
+Переносит переписку из массива chats.messages в коллекцию messages.
+
+Запуск из каталога backend:
+    python -m app.chat.migrate_messages [--batch-size 100]
+
+Повторный запуск безопасен: сообщения, перенесённые прерванным запуском,
+удаляются и переносятся заново, пока у чата остаётся старый массив.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.db.indexes import ensure_indexes
+
+
+async def migrate_chat(mongo: AsyncIOMotorDatabase, chat: dict) -> int:
+    messages = chat.get("messages") or []
+
+    await mongo.messages.delete_many({"chat_id": chat["_id"], "migrated": True})
+    if messages:
+        await mongo.messages.insert_many([
+            {
+                "chat_id": chat["_id"],
+                "role": m["role"],
+                "content": m["content"],
+                "timestamp": m.get("timestamp") or chat.get("created_at") or datetime.utcnow(),
+                "migrated": True,
+            }
+            for m in messages
+        ])
+
+    await mongo.chats.update_one({"_id": chat["_id"]}, {"$unset": {"messages": ""}})
+    return len(messages)
+
+
+async def migrate(mongo: AsyncIOMotorDatabase, batch_size: int = 100) -> tuple[int, int]:
+    await ensure_indexes(mongo)
+
+    chats = 0
+    messages = 0
+    cursor = mongo.chats.find(
+        {"messages": {"$exists": True}},
+        {"messages": 1, "created_at": 1},
+    ).batch_size(batch_size)
+
+    async for chat in cursor:
+        messages += await migrate_chat(mongo, chat)
+        chats += 1
+
+    return chats, messages
+
+
+async def main(batch_size: int):
+    from app.db.mongo import close_mongo, mongo_db
+
+    try:
+        chats, messages = await migrate(mongo_db, batch_size)
+    finally:
+        close_mongo()
+
+    print(f"migrated {messages} messages from {chats} chats")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,61 @@
+"""
+Проставляет старым чатам курсор текущего вопроса и карту question_id → позиция.
+
+Запуск из каталога backend:
+    python -m app.chat.migrate_questions [--batch-size 100]
+
+Заданные вопросы переносятся в начало массива, курсор встаёт на первый
+незаданный. Повторный запуск безопасен: чаты с картой позиций пропускаются.
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.chat.utils import arrange_questions, question_positions
+
+
+async def migrate_chat(mongo: AsyncIOMotorDatabase, chat: dict):
+    questions, cursor = arrange_questions(chat.get("questions") or [])
+
+    await mongo.chats.update_one(
+        {"_id": chat["_id"], "question_positions": {"$exists": False}},
+        {"$set": {
+            "questions": questions,
+            "question_positions": question_positions(questions),
+            "current_question_index": cursor,
+        }},
+    )
+
+
+async def migrate(mongo: AsyncIOMotorDatabase, batch_size: int = 100) -> int:
+    chats = 0
+    cursor = mongo.chats.find(
+        {"question_positions": {"$exists": False}},
+        {"questions": 1},
+    ).batch_size(batch_size)
+
+    async for chat in cursor:
+        await migrate_chat(mongo, chat)
+        chats += 1
+
+    return chats
+
+
+async def main(batch_size: int):
+    from app.db.mongo import close_mongo, mongo_db
+
+    try:
+        chats = await migrate(mongo_db, batch_size)
+    finally:
+        close_mongo()
+
+    print(f"migrated {chats} chats")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size))
@@ -1,8 +1,106 @@
+import base64
 from datetime import datetime
 from bson import ObjectId
-from typing import List
+from bson.errors import InvalidId
+from typing import AsyncIterator, List, TypedDict
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.chat.utils import evaluation_positions, question_positions
+
+MESSAGES_PAGE_SIZE = 50
+
+
+class ChatHeader(TypedDict):
+    chat_id: str
+    user_id: str
+    vacancy_id: str | None
+    vacancy_title: str | None
+    finished: bool
+    created_at: datetime
+
+
+class CurrentQuestion(TypedDict):
+    chat_id: str
+    finished: bool
+    version: int
+    question: dict | None
+
+
+class ChatQuestions(TypedDict):
+    chat_id: str
+    finished: bool
+    questions: list[dict]
+    question_positions: dict[str, int]
+
+
+class Transcript(TypedDict, total=False):
+    chat_id: str
+    finished: bool
+    version: int
+    messages: list[dict]
+    llm_context: list[int]
+    llm_context_model: str
+    llm_context_messages: int
+    history_summary: dict
+    # только при with_question=True
+    question: dict | None
+    next_question: dict | None
+
+
+HEADER_FIELDS = {
+    "user_id": 1,
+    "vacancy_id": 1,
+    "vacancy_title": 1,
+    "finished": 1,
+    "created_at": 1,
+}
+
+# текущий вопрос берётся по курсору, без просмотра массива
+CURRENT_QUESTION_FIELD = {
+    "current_question_index": 1,
+    "question": {"$arrayElemAt": ["$questions", "$current_question_index"]},
+}
+
+# после курсора идут только незаданные вопросы — следующий лежит сразу за ним
+NEXT_QUESTION_FIELD = {
+    "next_question": {"$arrayElemAt": ["$questions", {"$add": ["$current_question_index", 1]}]},
+}
+
+# состояние хода и LLM: нужно серверу, но не клиенту
+INTERNAL_FIELDS = {
+    "version": 0,
+    "llm_context": 0,
+    "llm_context_model": 0,
+    "llm_context_messages": 0,
+    "history_summary": 0,
+    "question_positions": 0,
+    "current_question_index": 0,
+}
+
+TRANSCRIPT_FIELDS = {
+    "finished": 1,
+    "version": 1,
+    "messages": 1,
+    "llm_context": 1,
+    "llm_context_model": 1,
+    "llm_context_messages": 1,
+    "history_summary": 1,
+}
+
+
+def encode_cursor(value: datetime, oid: ObjectId) -> str:
+    raw = f"{value.isoformat()}|{oid}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        value, oid = raw.split("|")
+        return datetime.fromisoformat(value), ObjectId(oid)
+    except (ValueError, InvalidId):
+        raise ValueError("Invalid cursor")
+
 
 def serialize_chat(chat: dict) -> dict:
     chat["chat_id"] = str(chat["_id"])
@@ -23,8 +121,10 @@ async def create_chat(
         "vacancy_id": vacancy_id,
         "vacancy_title": vacancy_title,
         "questions": questions,
-        "messages": [],
+        "question_positions": question_positions(questions),
+        "current_question_index": 0,
         "finished": False,
+        "version": 0,
         "questions_version": questions_version,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
@@ -38,8 +138,409 @@ async def get_chat(
     mongo: AsyncIOMotorDatabase,
     chat_id: str,
     user_id: str,
+    with_messages: bool = False,
 ):
+    # переписку грузим только тем, кому она действительно нужна;
+    # с перепиской чат уходит клиенту — служебные поля ему не нужны
+    chat = await mongo.chats.find_one(
+        {"_id": ObjectId(chat_id), "user_id": user_id},
+        INTERNAL_FIELDS if with_messages else {"messages": 0},
+    )
+    if not chat:
+        return None
+
+    if with_messages:
+        await _attach_messages(mongo, chat)
+
+    return serialize_chat(chat)
+
+
+async def _attach_messages(mongo: AsyncIOMotorDatabase, chat: dict):
+    # старые чаты до миграции ещё хранят часть переписки внутри документа
+    legacy = chat.pop("messages", [])
+    chat["messages"] = legacy + await list_all_messages(mongo, chat["_id"])
+
+
+def _pop_question(chat: dict) -> dict | None:
+    index = chat.pop("current_question_index", 0)
+    question = chat.pop("question", None)
+    # позиция нужна для точечных $set по questions.<index>
+    return {**question, "index": index} if question else None
+
+
+async def get_chat_header(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    user_id: str,
+) -> ChatHeader | None:
+    chat = await mongo.chats.find_one(
+        {"_id": ObjectId(chat_id), "user_id": user_id},
+        HEADER_FIELDS,
+    )
+    if not chat:
+        return None
+
+    chat.setdefault("vacancy_id", None)
+    chat.setdefault("vacancy_title", None)
+    chat.setdefault("finished", False)
+    return serialize_chat(chat)
+
+
+async def get_chat_question(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    user_id: str,
+) -> CurrentQuestion | None:
+    chat = await mongo.chats.find_one(
+        {"_id": ObjectId(chat_id), "user_id": user_id},
+        {"finished": 1, "version": 1, **CURRENT_QUESTION_FIELD},
+    )
+    if not chat:
+        return None
+
+    return {
+        "chat_id": str(chat["_id"]),
+        "finished": chat.get("finished", False),
+        "version": chat.get("version", 0),
+        "question": _pop_question(chat),
+    }
+
+
+async def get_chat_questions(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    user_id: str,
+) -> ChatQuestions | None:
+    chat = await mongo.chats.find_one(
+        {"_id": ObjectId(chat_id), "user_id": user_id},
+        {"finished": 1, "questions": 1, "question_positions": 1},
+    )
+    if not chat:
+        return None
+
+    chat.setdefault("finished", False)
+    chat.setdefault("questions", [])
+    chat.setdefault("question_positions", question_positions(chat["questions"]))
+    return serialize_chat(chat)
+
+
+async def get_transcript(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    user_id: str,
+    with_question: bool = False,
+) -> Transcript | None:
+    projection = dict(TRANSCRIPT_FIELDS)
+    if with_question:
+        projection.update(CURRENT_QUESTION_FIELD)
+        projection.update(NEXT_QUESTION_FIELD)
+
     chat = await mongo.chats.find_one(
-        {"_id": ObjectId(chat_id), "user_id": user_id}
+        {"_id": ObjectId(chat_id), "user_id": user_id},
+        projection,
+    )
+    if not chat:
+        return None
+
+    if with_question:
+        chat["question"] = _pop_question(chat)
+    chat.setdefault("finished", False)
+    chat.setdefault("version", 0)
+
+    await _attach_messages(mongo, chat)
+    return serialize_chat(chat)
+
+
+CHAT_LIST_FIELDS = {
+    "vacancy_title": 1,
+    "created_at": 1,
+    "finished": 1,
+}
+
+CHAT_EXPORT_FIELDS = {
+    **CHAT_LIST_FIELDS,
+    "vacancy_id": 1,
+    "evaluation": 1,
+    "messages": 1,
+}
+
+
+def serialize_chat_summary(chat: dict) -> dict:
+    return {
+        "id": str(chat["_id"]),
+        "title": chat.get("vacancy_title"),
+        "created_at": chat["created_at"],
+        "finished": chat.get("finished", False),
+    }
+
+
+def _user_chats_query(user_id: str, cursor: str | None) -> dict:
+    query: dict = {"user_id": user_id}
+    if cursor:
+        # keyset по (created_at, _id) от новых к старым
+        created_at, oid = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": oid}},
+        ]
+    return query
+
+
+async def list_chats(
+    mongo: AsyncIOMotorDatabase,
+    user_id: str,
+    cursor: str | None = None,
+    limit: int = 100,
+) -> tuple[list[dict], str | None]:
+    docs = await mongo.chats.find(
+        _user_chats_query(user_id, cursor),
+        CHAT_LIST_FIELDS,
+    ).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"])
+
+    return [serialize_chat_summary(c) for c in docs], next_cursor
+
+
+async def iter_chats(
+    mongo: AsyncIOMotorDatabase,
+    user_id: str,
+    batch_size: int,
+) -> AsyncIterator[dict]:
+    # в памяти — один батч курсора и переписка одного чата
+    cursor = mongo.chats.find(
+        {"user_id": user_id},
+        CHAT_EXPORT_FIELDS,
+    ).sort([("created_at", -1), ("_id", -1)]).batch_size(batch_size)
+
+    async for chat in cursor:
+        await _attach_messages(mongo, chat)
+        yield {
+            **serialize_chat_summary(chat),
+            "vacancy_id": chat.get("vacancy_id"),
+            "evaluation": chat.get("evaluation"),
+            "messages": chat["messages"],
+        }
+
+
+def serialize_message(message: dict) -> dict:
+    return {
+        "role": message["role"],
+        "content": message["content"],
+        "timestamp": message["timestamp"],
+    }
+
+
+async def list_all_messages(mongo: AsyncIOMotorDatabase, chat_id: ObjectId) -> list[dict]:
+    cursor = mongo.messages.find(
+        {"chat_id": chat_id},
+        {"role": 1, "content": 1, "timestamp": 1},
+    ).sort([("timestamp", 1), ("_id", 1)])
+    return [serialize_message(m) async for m in cursor]
+
+
+async def list_messages(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    cursor: str | None = None,
+    limit: int = MESSAGES_PAGE_SIZE,
+) -> tuple[list[dict], str | None]:
+    query: dict = {"chat_id": ObjectId(chat_id)}
+    if cursor:
+        # keyset по (timestamp, _id): страница не зависит от размера переписки
+        timestamp, oid = decode_cursor(cursor)
+        query["$or"] = [
+            {"timestamp": {"$gt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$gt": oid}},
+        ]
+
+    docs = await mongo.messages.find(
+        query,
+        {"role": 1, "content": 1, "timestamp": 1},
+    ).sort([("timestamp", 1), ("_id", 1)]).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["timestamp"], docs[-1]["_id"])
+
+    return [serialize_message(m) for m in docs], next_cursor
+
+
+def new_message(role: str, content: str) -> dict:
+    return {"role": role, "content": content, "timestamp": datetime.utcnow()}
+
+
+async def append_message(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    role: str,
+    content: str,
+):
+    await mongo.messages.insert_one({
+        "chat_id": ObjectId(chat_id),
+        **new_message(role, content),
+    })
+
+
+def _version_filter(chat_id: str, version: int) -> dict:
+    # у чатов, созданных до появления версий, поля нет — считаем его нулём
+    return {
+        "_id": ObjectId(chat_id),
+        "version": version if version else {"$in": [0, None]},
+    }
+
+
+async def commit_turn(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    version: int,
+    messages: list[dict],
+    update: dict | None = None,
+) -> bool:
+    update = dict(update or {})
+    update["$inc"] = {"version": 1}
+
+    # сначала занимаем версию: из двух параллельных ходов пишет только первый
+    chat = await mongo.chats.find_one_and_update(
+        _version_filter(chat_id, version),
+        update,
+        projection={"_id": 1},
     )
-    return serialize_chat(chat) if chat else None
\ No newline at end of file
+    if not chat:
+        return False
+
+    if messages:
+        await mongo.messages.insert_many(
+            [{"chat_id": chat["_id"], **m} for m in messages]
+        )
+    return True
+
+
+async def clear_messages(mongo: AsyncIOMotorDatabase, chat_id: str):
+    await mongo.messages.delete_many({"chat_id": ObjectId(chat_id)})
+    await mongo.chats.update_one(
+        {"_id": ObjectId(chat_id)},
+        {"$unset": {"messages": ""}},
+    )
+
+
+async def delete_user_chats(mongo: AsyncIOMotorDatabase, user_id: str):
+    chat_ids = await mongo.chats.distinct("_id", {"user_id": user_id})
+    if chat_ids:
+        await mongo.messages.delete_many({"chat_id": {"$in": chat_ids}})
+    await mongo.chats.delete_many({"user_id": user_id})
+
+
+async def save_evaluation(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    evaluation: list[dict],
+    questions: list[dict],
+):
+    # оценки находят свой вопрос по question_id, оценки без id — по тексту
+    updates = {"finished": True, "evaluation": evaluation}
+    for ev, index in zip(evaluation, evaluation_positions(questions, evaluation)):
+        if index is None:
+            continue
+        updates[f"questions.{index}.score"] = ev["score"]
+        updates[f"questions.{index}.mistakes"] = ev["score"] < 10
+
+    await mongo.chats.update_one(
+        {"_id": ObjectId(chat_id)},
+        {"$set": updates, "$inc": {"version": 1}},
+    )
+
+
+def _question_filter(chat_id: str, index: int, question_id: str, **fields) -> dict:
+    # позиция могла смениться при retry-mistakes — сверяем question_id
+    query = {"_id": ObjectId(chat_id), f"questions.{index}.question_id": question_id}
+    for field, value in fields.items():
+        query[f"questions.{index}.{field}"] = value
+    return query
+
+
+async def save_answer(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    index: int,
+    question_id: str,
+    answer: str,
+):
+    # засчитываем последний ответ на вопрос; старая оценка больше не актуальна
+    await mongo.chats.update_one(
+        _question_filter(chat_id, index, question_id),
+        {
+            "$set": {
+                f"questions.{index}.used": True,
+                f"questions.{index}.answer": answer,
+                f"questions.{index}.score": None,
+                f"questions.{index}.feedback": None,
+            },
+            # повторный ответ на тот же вопрос не сдвигает курсор дважды
+            "$max": {"current_question_index": index + 1},
+        },
+    )
+
+
+async def save_answer_score(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    index: int,
+    question_id: str,
+    answer: str,
+    score: int,
+    feedback: str,
+):
+    # пока оценивали, кандидат мог ответить на вопрос заново
+    await mongo.chats.update_one(
+        _question_filter(chat_id, index, question_id, answer=answer),
+        {"$set": {
+            f"questions.{index}.score": score,
+            f"questions.{index}.mistakes": score < 10,
+            f"questions.{index}.feedback": feedback,
+        }},
+    )
+
+
+async def save_speculation(
+    mongo: AsyncIOMotorDatabase,
+    chat_id: str,
+    index: int,
+    question_id: str,
+    hint: str,
+    model_answer: str,
+) -> bool:
+    # кандидат уже ответил на вопрос — заготовка не нужна
+    result = await mongo.chats.update_one(
+        _question_filter(chat_id, index, question_id, used=False),
+        {"$set": {
+            f"questions.{index}.hint": hint,
+            f"questions.{index}.model_answer": model_answer,
+        }},
+    )
+    return result.modified_count > 0
+
+
+def llm_context_update(
+    context: list[int] | None,
+    model: str,
+    covered_messages: int,
+) -> dict:
+    if not context:
+        return {"$unset": {
+            "llm_context": "",
+            "llm_context_model": "",
+            "llm_context_messages": "",
+        }}
+
+    return {
+        "$set": {
+            "llm_context": context,
+            "llm_context_model": model,
+            "llm_context_messages": covered_messages,
+        }
+    }
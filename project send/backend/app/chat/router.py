@@ -1,30 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from bson import ObjectId
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.chat.service import detect_vacancy_with_llm
-from datetime import datetime
 from app.chat.limits import today_range
-from app.llm.prompts import interview_system_prompt
-from app.llm.client import qwen_client
+from app.llm.client import qwen_client, MODEL
 
-from app.auth.deps import get_current_user
+from app.auth.deps import get_current_claims
+from app.core.config import settings
 from app.db.postgres import get_db
 from app.db.deps import get_mongo
 from app.chat.schemas import NewChatRequest, MessageRequest
-from app.chat.repository import create_chat, get_chat
+from app.chat.repository import (
+    MESSAGES_PAGE_SIZE,
+    create_chat,
+    get_chat,
+    get_chat_header,
+    get_chat_question,
+    get_chat_questions,
+    get_transcript,
+    append_message,
+    clear_messages,
+    commit_turn,
+    delete_user_chats,
+    iter_chats,
+    list_chats,
+    list_messages,
+    llm_context_update,
+    new_message,
+    save_evaluation,
+)
+from app.chat.context import build_turn_prompt
+from app.chat.evaluation import (
+    aggregate_evaluation,
+    answered_questions,
+    enqueue_evaluation,
+    is_answer,
+    pending_questions,
+    score_answer,
+)
+from app.chat.greetings import greeting_pool
+from app.chat.history import build_history, needs_summary, refresh_summary
+from app.chat.speculative import replay, speculation
+from app.chat.streaming import CONFLICT_DETAIL, SSE_HEADERS, ndjson_line, stream_reply
 from app.chat.service import (
     load_questions_for_vacancy,
     generate_greeting,
-    detect_vacancy_with_llm,
-    generate_questions_for_vacancy,
+    greeting_with_question,
+    detect_vacancy,
+    generate_hint,
+    generate_answer,
+    stream_hint,
+    stream_answer,
 )
+from app.chat.utils import arrange_questions, get_current_question, question_positions
+from app.vacancies.index import vacancy_index
+from app.vacancies.pregenerate import enqueue_pregeneration
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+QUESTIONS_RETRY_AFTER_SECONDS = 30
+
 
 @router.post("/new")
 async def new_chat(
-    user=Depends(get_current_user),
+    data: NewChatRequest | None = None,
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
+    db: AsyncSession = Depends(get_db),
 ):
     # лимит 3 интервью в день
     start, end = today_range()
@@ -39,56 +81,116 @@ async def new_chat(
             detail="Daily interview limit reached (3)",
         )
 
-    chat = {
-        "user_id": str(user.id),
-        "vacancy_id": None,
-        "vacancy_title": None,
-        "questions": [],
-        "current_question_index": 0,
-        "messages": [],
-        "finished": False,
-        "created_at": datetime.utcnow(),
-    }
+    if data is None:
+        chat = await create_chat(mongo, str(user.id), None, None, [], None)
+        return {"chat_id": chat["chat_id"]}
+
+    vacancy_title = data.vacancy_title
+    if not vacancy_title:
+        if not data.message:
+            raise HTTPException(status_code=400, detail="vacancy_title or message is required")
+        try:
+            vacancy_title = (await detect_vacancy(data.message, db)).title
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Vacancy not found")
+
+    # вопросы последней версии — из банка, без скана всех версий
+    try:
+        vacancy, questions, version = await load_questions_for_vacancy(
+            db, vacancy_title
+        )
+    except ValueError:
+        await vacancy_index.ensure_fresh(db)
+        if not vacancy_index.get(vacancy_title):
+            raise HTTPException(status_code=404, detail="Vacancy not found")
+
+        # вакансия есть, а вопросов ещё нет — готовим их в фоне
+        await enqueue_pregeneration(mongo, vacancy_title)
+        raise HTTPException(
+            status_code=503,
+            detail="Questions for this vacancy are being prepared",
+            headers={"Retry-After": str(QUESTIONS_RETRY_AFTER_SECONDS)},
+        )
+
+    chat = await create_chat(
+        mongo,
+        str(user.id),
+        str(vacancy.id),
+        vacancy.title,
+        questions,
+        version,
+    )
+
+    # приветствие — из пула, LLM только при промахе; первый вопрос — из банка,
+    # чтобы кандидат отвечал ровно на тот вопрос, который потом оценим
+    greeting = greeting_pool.take(vacancy.title)
+    if greeting is None:
+        greeting = await generate_greeting(vacancy.title, user_id=str(user.id))
+    first_question = get_current_question(questions)
+    greeting = greeting_with_question(greeting, first_question)
+    await append_message(mongo, chat["chat_id"], "assistant", greeting)
+
+    speculation.schedule(mongo, chat["chat_id"], first_question)
 
-    result = await mongo.chats.insert_one(chat)
+    return {"chat_id": chat["chat_id"], "greeting": greeting}
+
+
+@router.get("/export")
+async def export_chats(
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    async def lines():
+        async for chat in iter_chats(mongo, str(user.id), settings.CHATS_EXPORT_BATCH_SIZE):
+            yield ndjson_line(chat)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-    return {"chat_id": str(result.inserted_id)}
 
 @router.get("/{chat_id}")
 async def get_chat_state(
     chat_id: str,
-    user=Depends(get_current_user),
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    chat = await get_chat(mongo, chat_id, str(user.id))
+    chat = await get_chat(mongo, chat_id, str(user.id), with_messages=True)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     return chat
 
 
+@router.get("/{chat_id}/messages")
+async def get_chat_messages(
+    chat_id: str,
+    cursor: str | None = None,
+    limit: int = Query(MESSAGES_PAGE_SIZE, ge=1, le=200),
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    chat = await get_chat_header(mongo, chat_id, str(user.id))
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
 
+    try:
+        items, next_cursor = await list_messages(mongo, chat_id, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-from datetime import datetime
-from app.chat.utils import (
-    get_current_question,
-    mark_question_used,
-    apply_evaluation,
-)
-from app.chat.service import (
-    generate_hint,
-    generate_answer,
-    evaluate_chat,
-)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+FALLBACK_REPLY = "Продолжим интервью. Расскажи подробнее."
 
 
 @router.post("/{chat_id}/message")
 async def send_message(
     chat_id: str,
     data: MessageRequest,
-    user=Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    chat = await get_chat(mongo, chat_id, str(user.id))
+    chat = await get_transcript(mongo, chat_id, str(user.id), with_question=True)
     if not chat or chat.get("finished"):
         raise HTTPException(status_code=400, detail="Invalid chat")
 
@@ -96,162 +198,290 @@ async def send_message(
     if not user_text:
         raise HTTPException(status_code=400, detail="Empty message")
 
-    # 1️⃣ сохраняем сообщение пользователя
-    await mongo.chats.update_one(
-        {"_id": chat_id},
-        {
-            "$push": {
-                "messages": {
-                    "role": "user",
-                    "content": user_text,
-                    "timestamp": datetime.utcnow(),
-                }
-            }
-        },
+    # оцениваем и сдвигаем вопрос только настоящим ответом
+    answered = bool(chat["question"]) and is_answer(user_text, data.is_answer)
+    if answered:
+        # кандидат отвечает — заготовки к вопросу уже не успеют пригодиться
+        speculation.cancel(chat_id)
+
+    # 1️⃣ реплику пользователя запишем вместе с ответом одним ходом
+    user_message = new_message("user", user_text)
+
+    # 2️⃣ формируем prompt: при живом context — только новая реплика,
+    # иначе собираем историю диалога целиком
+    prompt, context = build_turn_prompt(chat, user_text, answered)
+
+    # 3️⃣ вызываем LLM (ОДИН раз)
+    data = await qwen_client.generate_raw(
+        prompt,
+        context=context,
+        user_id=str(user.id),
+        tag="message",
     )
 
-    # 2️⃣ собираем историю диалога
-    history = "\n".join(
-        f"{m['role']}: {m['content']}"
-        for m in chat.get("messages", [])
+    reply = (data.get("response") or "").strip()
+    if not reply:
+        reply = FALLBACK_REPLY
+
+    # 4️⃣ сохраняем обе реплики и новый context, если чат не меняли параллельно
+    saved = await commit_turn(
+        mongo,
+        chat_id,
+        chat["version"],
+        [user_message, new_message("assistant", reply)],
+        llm_context_update(
+            data.get("context"),
+            MODEL,
+            len(chat.get("messages", [])) + 2,
+        ),
     )
+    if not saved:
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
 
-    # 3️⃣ формируем prompt
-    prompt = f"""
-Ты — опытный технический интервьюер.
-Веди интервью строго и профессионально.
-Задавай уточняющие вопросы.
-Не объясняй, что ты ИИ.
+    # 5️⃣ оцениваем ответ на текущий вопрос уже после ответа
+    if answered:
+        background_tasks.add_task(
+            score_answer, mongo, chat_id, chat["question"], user_text, str(user.id)
+        )
 
-История диалога:
-{history}
+    # 6️⃣ сворачиваем старые реплики в конспект уже после ответа
+    if needs_summary(chat):
+        background_tasks.add_task(refresh_summary, mongo, chat_id, chat)
 
-user: {user_text}
-assistant:
-""".strip()
+    # 7️⃣ возвращаем ответ фронту
+    return {"reply": reply}
 
-    # 4️⃣ вызываем LLM (ОДИН раз)
-    reply = await qwen_client.generate(prompt)
 
-    reply = (reply or "").strip()
-    if not reply:
-        reply = "Продолжим интервью. Расскажи подробнее."
+@router.post("/{chat_id}/message/stream")
+async def send_message_stream(
+    chat_id: str,
+    data: MessageRequest,
+    background_tasks: BackgroundTasks,
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    chat = await get_transcript(mongo, chat_id, str(user.id), with_question=True)
+    if not chat or chat.get("finished"):
+        raise HTTPException(status_code=400, detail="Invalid chat")
 
-    # 5️⃣ сохраняем ответ ассистента
-    await mongo.chats.update_one(
-        {"_id": chat_id},
-        {
-            "$push": {
-                "messages": {
-                    "role": "assistant",
-                    "content": reply,
-                    "timestamp": datetime.utcnow(),
-                }
-            }
-        },
-    )
+    user_text = data.content.strip()
+    if not user_text:
+        raise HTTPException(status_code=400, detail="Empty message")
 
-    # 6️⃣ возвращаем ответ фронту
-    return {"reply": reply}
+    # оцениваем и сдвигаем вопрос только настоящим ответом
+    answered = bool(chat["question"]) and is_answer(user_text, data.is_answer)
+    if answered:
+        # кандидат отвечает — заготовки к вопросу уже не успеют пригодиться
+        speculation.cancel(chat_id)
+
+    user_message = new_message("user", user_text)
+
+    prompt, context = build_turn_prompt(chat, user_text, answered)
+
+    # очередь переполнена — отвечаем 503 до начала стрима
+    qwen_client.scheduler.raise_if_overloaded()
+
+    if needs_summary(chat):
+        background_tasks.add_task(refresh_summary, mongo, chat_id, chat)
+
+    async def save_reply(reply: str, final: dict) -> bool:
+        saved = await commit_turn(
+            mongo,
+            chat_id,
+            chat["version"],
+            [user_message, new_message("assistant", reply)],
+            llm_context_update(
+                final.get("context"),
+                MODEL,
+                len(chat.get("messages", [])) + 2,
+            ),
+        )
+        # фоновые задачи запустятся, когда стрим закончится
+        if saved and answered:
+            background_tasks.add_task(
+                score_answer, mongo, chat_id, chat["question"], user_text, str(user.id)
+            )
+        return saved
+
+    return StreamingResponse(
+        stream_reply(
+            qwen_client.stream(
+                prompt,
+                context=context,
+                user_id=str(user.id),
+                tag="message",
+            ),
+            save_reply,
+            FALLBACK_REPLY,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
 
 @router.post("/{chat_id}/hint")
 async def get_hint(
     chat_id: str,
-    user=Depends(get_current_user),
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    chat = await get_chat(mongo, chat_id, str(user.id))
-    question = get_current_question(chat["questions"])
+    chat = await get_transcript(mongo, chat_id, str(user.id), with_question=True)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
 
+    question = chat["question"]
     if not question:
         raise HTTPException(status_code=400, detail="No active question")
 
-    hint = await generate_hint(
+    # заготовленная подсказка отдаётся без обращения к LLM
+    hint = question.get("hint") or await generate_hint(
         question["text"],
-        context=" ".join(m["content"] for m in chat["messages"] if m["role"] == "user"),
+        context=build_history(chat, "hint"),
+        user_id=str(user.id),
     )
 
-    await mongo.chats.update_one(
-        {"_id": chat_id},
-        {
-            "$push": {
-                "messages": {
-                    "role": "assistant",
-                    "content": hint,
-                    "timestamp": datetime.utcnow(),
-                }
-            }
-        },
+    saved = await commit_turn(
+        mongo, chat_id, chat["version"], [new_message("assistant", hint)]
     )
+    if not saved:
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
 
     return {"hint": hint}
 
 
+@router.post("/{chat_id}/hint/stream")
+async def get_hint_stream(
+    chat_id: str,
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    chat = await get_transcript(mongo, chat_id, str(user.id), with_question=True)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    question = chat["question"]
+    if not question:
+        raise HTTPException(status_code=400, detail="No active question")
+
+    if question.get("hint"):
+        chunks = replay(question["hint"])
+    else:
+        qwen_client.scheduler.raise_if_overloaded()
+        chunks = stream_hint(
+            question["text"],
+            context=build_history(chat, "hint"),
+            user_id=str(user.id),
+        )
+
+    async def save_hint(hint: str, final: dict) -> bool:
+        return await commit_turn(
+            mongo, chat_id, chat["version"], [new_message("assistant", hint)]
+        )
+
+    return StreamingResponse(
+        stream_reply(chunks, save_hint),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.post("/{chat_id}/answer")
 async def get_answer(
     chat_id: str,
-    user=Depends(get_current_user),
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    chat = await get_chat(mongo, chat_id, str(user.id))
-    question = get_current_question(chat["questions"])
+    current = await get_chat_question(mongo, chat_id, str(user.id))
+    if not current:
+        raise HTTPException(status_code=404, detail="Chat not found")
 
+    question = current["question"]
     if not question:
         raise HTTPException(status_code=400, detail="No active question")
 
-    answer = await generate_answer(question["text"])
+    answer = question.get("model_answer") or await generate_answer(
+        question["text"], user_id=str(user.id)
+    )
 
-    await mongo.chats.update_one(
-        {"_id": chat_id},
-        {
-            "$push": {
-                "messages": {
-                    "role": "assistant",
-                    "content": answer,
-                    "timestamp": datetime.utcnow(),
-                }
-            }
-        },
+    saved = await commit_turn(
+        mongo, chat_id, current["version"], [new_message("assistant", answer)]
     )
+    if not saved:
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
 
     return {"answer": answer}
 
 
+@router.post("/{chat_id}/answer/stream")
+async def get_answer_stream(
+    chat_id: str,
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    current = await get_chat_question(mongo, chat_id, str(user.id))
+    if not current:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    question = current["question"]
+    if not question:
+        raise HTTPException(status_code=400, detail="No active question")
+
+    if question.get("model_answer"):
+        chunks = replay(question["model_answer"])
+    else:
+        qwen_client.scheduler.raise_if_overloaded()
+        chunks = stream_answer(question["text"], user_id=str(user.id))
+
+    async def save_answer(answer: str, final: dict) -> bool:
+        return await commit_turn(
+            mongo, chat_id, current["version"], [new_message("assistant", answer)]
+        )
+
+    return StreamingResponse(
+        stream_reply(chunks, save_answer),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.post("/{chat_id}/finish")
 async def finish_chat(
     chat_id: str,
-    user=Depends(get_current_user),
+    response: Response,
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    chat = await get_chat(mongo, chat_id, str(user.id))
+    chat = await get_chat_questions(mongo, chat_id, str(user.id))
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    history = "\n".join(
-        f"{m['role']}: {m['content']}" for m in chat["messages"]
-    )
+    speculation.cancel(chat_id)
+
+    questions = chat["questions"]
+    if answered_questions(questions) and not pending_questions(questions):
+        # все ответы уже оценены по ходу интервью — только собираем итог
+        evaluation = aggregate_evaluation(questions)
+        await save_evaluation(mongo, chat_id, evaluation, questions)
+        return {"status": "done", "evaluation": evaluation}
 
-    evaluation = await evaluate_chat(history)
-    apply_evaluation(chat["questions"], evaluation)
+    # остальное доделывает воркер;
+    # результат — GET /jobs/{job_id} или поток /jobs/{job_id}/events
+    job = await enqueue_evaluation(mongo, chat_id, str(user.id))
+    response.status_code = 202
 
+    # новые реплики уже не попадут в оценку
     await mongo.chats.update_one(
-        {"_id": chat_id},
-        {
-            "$set": {
-                "questions": chat["questions"],
-                "finished": True,
-            }
-        },
+        {"_id": ObjectId(chat_id)},
+        {"$set": {"finished": True}, "$inc": {"version": 1}},
     )
 
-    return {"evaluation": evaluation}
+    return {"job_id": str(job["_id"]), "status": job["status"]}
 
 
 @router.post("/{chat_id}/retry-mistakes")
 async def retry_mistakes(
     chat_id: str,
-    user=Depends(get_current_user),
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
     chat = await get_chat(mongo, chat_id, str(user.id))
@@ -262,51 +492,62 @@ async def retry_mistakes(
         if q["mistakes"]:
             q["used"] = False
             q["score"] = None
+            q["answer"] = None
+            q["feedback"] = None
 
+    # курсор встаёт на первый вопрос для повтора, после него — только незаданные
+    questions, cursor = arrange_questions(chat["questions"])
+
+    await clear_messages(mongo, chat_id)
     await mongo.chats.update_one(
-        {"_id": chat_id},
+        {"_id": ObjectId(chat_id)},
         {
             "$set": {
-                "questions": chat["questions"],
+                "questions": questions,
+                "question_positions": question_positions(questions),
+                "current_question_index": cursor,
                 "finished": False,
-                "messages": [],
-            }
+            },
+            # ходы, начатые до сброса, не должны дописаться в новую попытку
+            "$inc": {"version": 1},
+            "$unset": {
+                "llm_context": "",
+                "llm_context_model": "",
+                "llm_context_messages": "",
+                "history_summary": "",
+                "evaluation": "",
+            },
         },
     )
 
+    speculation.schedule(mongo, chat_id, get_current_question(questions, cursor))
+
     return {"status": "restarted_only_mistakes"}
 
 
 @router.delete("/clear")
 async def clear_chats(
-    user=Depends(get_current_user),
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    await mongo.chats.delete_many({"user_id": str(user.id)})
+    await delete_user_chats(mongo, str(user.id))
     return {"status": "cleared"}
 
 
-
 @router.get("")
-async def list_chats(
-    user=Depends(get_current_user),
+async def get_chats(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(settings.CHATS_PAGE_SIZE, ge=1, le=200),
+    user=Depends(get_current_claims),
     mongo=Depends(get_mongo),
 ):
-    chats = await mongo.chats.find(
-        {"user_id": str(user.id)},
-        {
-            "vacancy_title": 1,
-            "created_at": 1,
-            "finished": 1,
-        }
-    ).sort("created_at", -1).to_list(100)
-
-    return [
-        {
-            "id": str(c["_id"]),
-            "title": c.get("vacancy_title"),
-            "created_at": c["created_at"],
-            "finished": c["finished"],
-        }
-        for c in chats
-    ]
\ No newline at end of file
+    try:
+        chats, next_cursor = await list_chats(mongo, str(user.id), cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # тело остаётся массивом, как ждёт фронтенд; следующая страница — в заголовке
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return chats
@@ -1,14 +1,18 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
 
 class NewChatRequest(BaseModel):
-    vacancy_title: str
+    vacancy_title: Optional[str] = None
+    # без vacancy_title вакансия определяется по первому сообщению
+    message: Optional[str] = None
 
 
 class MessageRequest(BaseModel):
     content: str
+    # явная отметка ответа на текущий вопрос; None — определяется по тексту
+    is_answer: Optional[bool] = None
 
 
 class ChatMessage(BaseModel):
@@ -29,4 +33,15 @@ class ChatResponse(BaseModel):
     chat_id: str
     messages: List[ChatMessage]
     questions: List[QuestionState]
-    finished: bool
\ No newline at end of file
+    finished: bool
+
+
+class EvaluationItem(BaseModel):
+    question: str
+    score: int = Field(ge=0, le=10)
+    feedback: str = ""
+
+
+class AnswerScore(BaseModel):
+    score: int = Field(ge=0, le=10)
+    feedback: str = ""
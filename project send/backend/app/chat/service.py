@@ -1,15 +1,20 @@
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from app.vacancies.models import Vacancy
-from app.vacancies.questions_models import Question
+from app.vacancies.index import VacancyEntry, vacancy_index
+from app.vacancies.question_bank import question_bank
 from app.llm.client import qwen_client
+from app.llm.cache import cached_generate, cached_stream
+from app.llm.json_stream import parse_object, response_format, stream_array
+from app.llm.scheduler import Priority
+from app.chat.schemas import AnswerScore, EvaluationItem
 from app.llm.prompts import (
     interview_greeting,
     hint_prompt,
     answer_prompt,
     evaluation_prompt,
+    answer_evaluation_prompt,
+    detect_vacancy_prompt,
 )
 
 
@@ -17,133 +22,144 @@ async def load_questions_for_vacancy(
     db: AsyncSession,
     vacancy_title: str,
 ):
-    vacancy = (
-        await db.execute(
-            select(Vacancy).where(Vacancy.title == vacancy_title)
-        )
-    ).scalar_one_or_none()
-
+    # последняя версия вопросов берётся из банка, в БД — только при промахе
+    vacancy = await question_bank.load(db, vacancy_title)
     if not vacancy:
-        raise ValueError("Vacancy not found")
-
-    questions = (
-        await db.execute(
-            select(Question)
-            .where(Question.vacancy_id == vacancy.id)
-            .order_by(Question.version.desc())
-        )
-    ).scalars().all()
-
-    if not questions:
         raise ValueError("No questions for vacancy")
 
-    latest_version = max(q.version for q in questions)
+    return vacancy, vacancy.questions_state(), vacancy.version
 
-    questions_state = [
-        {
-            "question_id": str(q.id),
-            "text": q.question,
-            "used": False,
-            "mistakes": False,
-            "score": None,
-        }
-        for q in questions
-        if q.version == latest_version
-    ]
 
-    return vacancy, questions_state, latest_version
+async def generate_greeting(vacancy_title: str, user_id: str | None = None) -> str:
+    prompt = interview_greeting(vacancy_title)
+    return await cached_generate(prompt, user_id=user_id, tag="greeting")
 
 
-async def generate_greeting(vacancy_title: str) -> str:
-    prompt = interview_greeting(vacancy_title)
-    return await qwen_client.generate(prompt)
+def greeting_with_question(greeting: str, question: dict | None) -> str:
+    # приветствие общее на вакансию, первый вопрос — всегда из банка чата
+    if not question:
+        return greeting
+    return f"{greeting}\n\n{question['text']}"
 
 
 from app.chat.utils import get_current_question
 
 
-async def generate_hint(question: str, context: str) -> str:
+async def generate_hint(
+    question: str,
+    context: str,
+    user_id: str | None = None,
+    priority: Priority = Priority.ASSIST,
+) -> str:
     prompt = hint_prompt(question, context)
-    return await qwen_client.generate(prompt)
+    return await qwen_client.generate(
+        prompt,
+        priority=priority,
+        user_id=user_id,
+        tag="hint",
+    )
+
+
+async def generate_answer(
+    question: str,
+    user_id: str | None = None,
+    priority: Priority = Priority.ASSIST,
+) -> str:
+    prompt = answer_prompt(question)
+    return await cached_generate(
+        prompt,
+        priority=priority,
+        user_id=user_id,
+        tag="answer",
+    )
 
 
-async def generate_answer(question: str) -> str:
+def stream_hint(question: str, context: str, user_id: str | None = None):
+    prompt = hint_prompt(question, context)
+    return qwen_client.stream(
+        prompt,
+        priority=Priority.ASSIST,
+        user_id=user_id,
+        tag="hint",
+    )
+
+
+def stream_answer(question: str, user_id: str | None = None):
     prompt = answer_prompt(question)
-    return await qwen_client.generate(prompt)
+    return cached_stream(
+        prompt,
+        priority=Priority.ASSIST,
+        user_id=user_id,
+        tag="answer",
+    )
 
 
-async def evaluate_chat(chat_history: str) -> list[dict]:
-    prompt = evaluation_prompt(chat_history)
-    raw = await qwen_client.generate(prompt)
+EVALUATION_SCHEMA = {"type": "array", "items": EvaluationItem.model_json_schema()}
 
-    import json
 
+async def evaluate_chat(chat_history: str, user_id: str | None = None) -> list[dict]:
+    prompt = evaluation_prompt(chat_history)
+    chunks = qwen_client.stream(
+        prompt,
+        priority=Priority.EVALUATION,
+        user_id=user_id,
+        tag="evaluation",
+        format=response_format(EVALUATION_SCHEMA),
+    )
+
+    # разбираем оценки по мере генерации, мусор вокруг JSON пропускаем
+    evaluation = []
     try:
-        return json.loads(raw)
+        async for item in stream_array(chunks, EvaluationItem):
+            evaluation.append(item.model_dump())
     except Exception:
-        raise ValueError("LLM returned invalid JSON")
-    
-
-async def detect_vacancy_with_llm(user_message: str, db: AsyncSession):
-    vacancies = (await db.execute(select(Vacancy))).scalars().all()
-    titles = [v.title for v in vacancies]
+        # генерация оборвалась — уже разобранные оценки не выбрасываем
+        if not evaluation:
+            raise
 
-    prompt = detect_vacancy_prompt(user_message, titles)
-    detected = await qwen_client.generate(prompt)
-
-    for v in vacancies:
-        if v.title.lower() in detected.lower():
-            return v
-
-    raise ValueError("Vacancy not detected")
+    if not evaluation:
+        raise ValueError("LLM returned invalid JSON")
+    return evaluation
 
 
-from sqlalchemy import select
-from app.vacancies.models import Vacancy
-from app.llm.prompts import detect_vacancy_prompt
-from app.llm.client import qwen_client
+async def evaluate_answer(
+    question: str,
+    answer: str,
+    user_id: str | None = None,
+) -> dict:
+    prompt = answer_evaluation_prompt(question, answer)
+    raw = await qwen_client.generate(
+        prompt,
+        priority=Priority.EVALUATION,
+        user_id=user_id,
+        tag="answer_score",
+        format=response_format(AnswerScore.model_json_schema()),
+    )
 
+    return parse_object(raw, AnswerScore).model_dump()
 
-async def detect_vacancy_with_llm(user_message: str, db):
-    result = await db.execute(select(Vacancy))
-    vacancies = result.scalars().all()
 
-    if not vacancies:
+async def detect_vacancy(user_message: str, db: AsyncSession) -> VacancyEntry:
+    await vacancy_index.ensure_fresh(db)
+    if not vacancy_index.entries:
         raise ValueError("No vacancies in database")
 
-    titles = [v.title for v in vacancies]
+    # обычно хватает локального индекса — без запроса к LLM
+    vacancy = vacancy_index.match(user_message)
+    if vacancy:
+        return vacancy
 
-    prompt = detect_vacancy_prompt(user_message, titles)
+    # неуверенный матч: модель выбирает среди ближайших кандидатов
+    candidates = [entry for score, entry in vacancy_index.search(user_message) if score > 0]
+    candidates = candidates or vacancy_index.entries
 
-    detected = await qwen_client.generate(prompt)
+    prompt = detect_vacancy_prompt(user_message, [v.title for v in candidates])
+    detected = await qwen_client.generate(prompt, tag="detect_vacancy")
 
-    # простой, но надёжный матч
     detected_lower = detected.lower()
-    for v in vacancies:
+    for v in candidates:
         if v.title.lower() in detected_lower:
             return v
 
-    # fallback — первая вакансия (чтобы НЕ падать)
-    return vacancies[0]
-
-
-from app.llm.client import qwen_client
-from app.llm.prompts import generate_questions_prompt
-
-
-async def generate_questions_for_vacancy(vacancy_title: str) -> list[dict]:
-    prompt = generate_questions_prompt(vacancy_title)
-    raw = await qwen_client.generate(prompt)
-
-    questions = []
-    for line in raw.split("\n"):
-        line = line.strip("-• ").strip()
-        if line:
-            questions.append({
-                "text": line,
-                "used": False,
-                "mistakes": False,
-                "score": None,
-            })
-
-    return questions
\ No newline at end of file
+    # fallback — лучший кандидат (чтобы НЕ падать)
+    return candidates[0]
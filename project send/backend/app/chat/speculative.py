@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Callable
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from prometheus_client import Counter
+
+from app.chat.repository import save_speculation
+from app.chat.service import generate_answer, generate_hint
+from app.core.config import settings
+from app.llm.client import qwen_client
+from app.llm.scheduler import Priority
+
+logger = logging.getLogger("app.chat")
+
+SPECULATIVE_TASKS = Counter(
+    "speculative_tasks_total",
+    "Speculative hint/answer precomputations by outcome",
+    ["result"],
+)
+
+# общая подсказка готовится до ответа кандидата
+NO_ANSWER_CONTEXT = "Кандидат ещё не отвечал."
+
+
+def scheduler_idle() -> bool:
+    scheduler = qwen_client.scheduler
+    return not scheduler.queue_depth and scheduler.in_flight < scheduler.max_in_flight
+
+
+async def replay(text: str):
+    # готовый текст отдаём стриму одним чанком, как кэш LLM
+    yield {"response": text, "done": True}
+
+
+class Speculation:
+    def __init__(
+        self,
+        max_tasks: int,
+        enabled: bool = True,
+        idle: Callable[[], bool] = scheduler_idle,
+    ):
+        self.max_tasks = max_tasks
+        self.enabled = enabled
+        self.idle = idle
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    def schedule(self, mongo: AsyncIOMotorDatabase, chat_id: str, question: dict | None):
+        # заготовка к прошлому вопросу больше не нужна
+        self.cancel(chat_id)
+        if not self.enabled or not question:
+            return
+        if question.get("hint") and question.get("model_answer"):
+            return
+
+        # бюджет: только свободные слоты LLM и не больше max_tasks заготовок
+        if self.running >= self.max_tasks or not self.idle():
+            SPECULATIVE_TASKS.labels("skipped").inc()
+            return
+
+        task = asyncio.create_task(self._run(mongo, chat_id, question))
+        self._tasks[chat_id] = task
+        task.add_done_callback(lambda t: self._forget(chat_id, t))
+
+    def cancel(self, chat_id: str):
+        task = self._tasks.pop(chat_id, None)
+        if task and not task.done():
+            task.cancel()
+            SPECULATIVE_TASKS.labels("cancelled").inc()
+
+    def _forget(self, chat_id: str, task: asyncio.Task):
+        if self._tasks.get(chat_id) is task:
+            del self._tasks[chat_id]
+
+    async def _run(self, mongo: AsyncIOMotorDatabase, chat_id: str, question: dict):
+        try:
+            # эталонный ответ идёт через кэш LLM и переиспользуется другими кандидатами
+            model_answer = await generate_answer(question["text"], priority=Priority.BATCH)
+            hint = await generate_hint(
+                question["text"],
+                context=NO_ANSWER_CONTEXT,
+                priority=Priority.BATCH,
+            )
+            saved = await save_speculation(
+                mongo,
+                chat_id,
+                question["index"],
+                question["question_id"],
+                hint,
+                model_answer,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Speculative precompute for chat %s failed", chat_id)
+            SPECULATIVE_TASKS.labels("failed").inc()
+            return
+
+        SPECULATIVE_TASKS.labels("saved" if saved else "discarded").inc()
+
+    async def aclose(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+speculation = Speculation(
+    max_tasks=settings.SPECULATIVE_MAX_TASKS,
+    enabled=settings.SPECULATIVE_PRECOMPUTE,
+)
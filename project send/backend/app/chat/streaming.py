@@ -0,0 +1,49 @@
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+CONFLICT_DETAIL = "Chat was modified by another request"
+
+# прокси не должен буферизовать поток событий
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+
+def ndjson_line(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+
+async def stream_reply(
+    chunks: AsyncIterator[dict],
+    on_complete: Callable[[str, dict], Awaitable[bool | None]],
+    fallback: str = "",
+) -> AsyncIterator[str]:
+    parts = []
+    final: dict = {}
+
+    async for chunk in chunks:
+        token = chunk.get("response", "")
+        if token:
+            parts.append(token)
+            yield sse_event({"token": token})
+        if chunk.get("done"):
+            # последний чанк несёт context и метрики генерации
+            final = chunk
+
+    text = "".join(parts).strip() or fallback
+
+    # сохраняем ответ только после того, как стрим дошёл до конца
+    if await on_complete(text, final) is False:
+        # чат успели изменить параллельным запросом — ответ не сохранён
+        yield sse_event({"detail": CONFLICT_DETAIL}, event="error")
+        return
+
+    yield sse_event({"content": text}, event="done")
@@ -1,20 +1,54 @@
-def get_current_question(questions: list[dict]) -> dict | None:
-    for q in questions:
-        if not q["used"]:
-            return q
-    return None
+def question_positions(questions: list[dict]) -> dict[str, int]:
+    return {q["question_id"]: i for i, q in enumerate(questions)}
 
 
-def mark_question_used(questions: list[dict], question_id: str):
-    for q in questions:
-        if q["question_id"] == question_id:
-            q["used"] = True
-            return
+def evaluation_positions(questions: list[dict], evaluation: list[dict]) -> list[int | None]:
+    # оценка переписки целиком приходит без question_id — сопоставляем по тексту,
+    # но обе карты строим один раз, без перебора вопросов на каждую оценку
+    positions = question_positions(questions)
+    by_text = {q["text"]: i for i, q in enumerate(questions)}
+    return [
+        positions.get(ev["question_id"]) if ev.get("question_id") else by_text.get(ev.get("question"))
+        for ev in evaluation
+    ]
+
+
+def next_question_index(questions: list[dict], start: int = 0) -> int:
+    # курсор только растёт: вопросы до него уже заданы
+    for i in range(start, len(questions)):
+        if not questions[i]["used"]:
+            return i
+    return len(questions)
+
+
+def get_current_question(questions: list[dict], index: int = 0) -> dict | None:
+    index = next_question_index(questions, index)
+    if index == len(questions):
+        return None
+    return {**questions[index], "index": index}
+
+
+def arrange_questions(questions: list[dict]) -> tuple[list[dict], int]:
+    # заданные вопросы — в начало, чтобы после курсора шли только незаданные
+    done = [q for q in questions if q["used"]]
+    pending = [q for q in questions if not q["used"]]
+    return done + pending, len(done)
+
+
+def mark_question_used(
+    questions: list[dict],
+    question_id: str,
+    positions: dict[str, int] | None = None,
+):
+    positions = positions if positions is not None else question_positions(questions)
+    index = positions.get(question_id)
+    if index is not None:
+        questions[index]["used"] = True
 
 
 def apply_evaluation(questions: list[dict], evaluation: list[dict]):
-    for ev in evaluation:
-        for q in questions:
-            if q["text"] == ev["question"]:
-                q["score"] = ev["score"]
-                q["mistakes"] = ev["score"] < 10
\ No newline at end of file
+    for ev, index in zip(evaluation, evaluation_positions(questions, evaluation)):
+        if index is None:
+            continue
+        questions[index]["score"] = ev["score"]
+        questions[index]["mistakes"] = ev["score"] < 10
@@ -8,13 +8,97 @@ class Settings(BaseSettings):
     POSTGRES_DSN: str
     MONGO_DSN: str
 
+    # пулы соединений с базами
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 10.0
+    POSTGRES_POOL_RECYCLE: int = 1800
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    # индекс без обращений за это время попадает в предупреждение «unused»
+    MONGO_INDEX_UNUSED_AFTER_HOURS: float = 24.0
+
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # стоимость Argon2; при изменении старые хэши пересчитываются при входе
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    # пул потоков для хэширования паролей и лимит ожидающих задач
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32
+
     LLM_API_KEY: str
 
+    # список чатов: размер страницы и батч курсора Mongo при выгрузке
+    CHATS_PAGE_SIZE: int = 100
+    CHATS_EXPORT_BATCH_SIZE: int = 100
+
+    # банк вопросов последней версии по вакансиям
+    QUESTION_BANK_TTL_SECONDS: float = 600.0
+
+    # пул заранее сгенерированных приветствий с первым вопросом
+    GREETING_POOL_SIZE: int = 5
+    GREETING_POOL_LOW_WATERMARK: int = 2
+    GREETING_POOL_TEMPERATURE: float = 0.9
+    GREETING_POOL_WARM: bool = False  # наполнять пулы всех вакансий при старте
+
+    # заранее готовить подсказку и эталонный ответ к текущему вопросу,
+    # пока у LLM есть свободные слоты
+    SPECULATIVE_PRECOMPUTE: bool = False
+    SPECULATIVE_MAX_TASKS: int = 2
+
+    # локальный поиск вакансии по сообщению; ниже порога решает LLM
+    VACANCY_INDEX_TTL_SECONDS: float = 600.0
+    VACANCY_MATCH_THRESHOLD: float = 0.55
+    VACANCY_MATCH_MARGIN: float = 0.15
+
+    # кэш ответов LLM на детерминированные промпты
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 2000
+    LLM_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    LLM_CACHE_MONGO: bool = False
+
+    # узлы с моделью: "http://a:11434,openai=http://b:8000"
+    LLM_BACKENDS: str = "http://localhost:11434"
+    LLM_BALANCING: str = "least_outstanding"  # или "ewma"
+    LLM_BREAKER_FAILURES: int = 3
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    LLM_RETRIES: int = 1
+
+    # HTTP-клиент к LLM: read-таймаут — это время генерации ответа
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_READ_TIMEOUT: float = 120.0
+    LLM_WRITE_TIMEOUT: float = 10.0
+    LLM_POOL_TIMEOUT: float = 10.0
+    LLM_MAX_CONNECTIONS: int = 32
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP2: bool = False  # требует пакет h2 (httpx[http2])
+
+    # ограничение вывода JSON у Ollama: "schema" (>= 0.5), "json" или "off"
+    LLM_JSON_MODE: str = "schema"
+
+    # доля вызовов LLM, которые пишутся в debug-лог
+    LLM_DEBUG_SAMPLE_RATE: float = 0.0
+
+    # диспетчер запросов к LLM
+    LLM_MAX_IN_FLIGHT: int = 4
+    LLM_MAX_QUEUE: int = 64
+    LLM_RETRY_AFTER_SECONDS: int = 5
+
+    # фоновые задачи (оценка интервью, генерация вопросов); 0 — воркеры запускаются отдельно
+    JOB_WORKERS: int = 1
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0
+
     class Config:
         env_file = ".env"
 
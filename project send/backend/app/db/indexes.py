@@ -0,0 +1,108 @@
+import logging
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.core.config import settings
+from app.jobs.queue import ACTIVE
+
+logger = logging.getLogger("app.db")
+
+# все индексы Mongo объявляются здесь, рядом с запросами, которые они обслуживают
+INDEXES: dict[str, list[IndexModel]] = {
+    "chats": [
+        # лимит за день (count_documents по user_id + created_at),
+        # список чатов и выгрузка (keyset по created_at desc, _id desc),
+        # очистка (delete_many по user_id — префикс индекса)
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_id_created_at_id",
+        ),
+    ],
+    "messages": [
+        # переписка чата по порядку и keyset-пагинация по (timestamp, _id)
+        IndexModel(
+            [("chat_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+            name="chat_id_timestamp",
+        ),
+    ],
+    "jobs": [
+        # выборка следующей задачи воркером: status + run_at, sort run_at
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+        # не больше одной незавершённой задачи на dedupe_key:
+        # гонку find_one + insert_one в enqueue решает уникальность
+        IndexModel(
+            [("dedupe_key", ASCENDING)],
+            name="dedupe_key_active",
+            unique=True,
+            partialFilterExpression={
+                "dedupe_key": {"$type": "string"},
+                "status": {"$in": list(ACTIVE)},
+            },
+        ),
+    ],
+    "llm_cache": [
+        IndexModel(
+            [("expires_at", ASCENDING)],
+            name="expires_at_ttl",
+            expireAfterSeconds=0,
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    # create_indexes идемпотентен: существующие индексы с той же схемой не трогает
+    for collection, models in INDEXES.items():
+        await db[collection].create_indexes(models)
+
+
+async def index_report(
+    db: AsyncIOMotorDatabase,
+    unused_after: timedelta | None = None,
+) -> dict[str, dict[str, list[str]]]:
+    if unused_after is None:
+        unused_after = timedelta(hours=settings.MONGO_INDEX_UNUSED_AFTER_HOURS)
+    # счётчики $indexStats обнуляются при рестарте mongod:
+    # неиспользуемым считаем только индекс, который давно копит статистику
+    counted_since = datetime.utcnow() - unused_after
+
+    report = {}
+
+    for collection, models in INDEXES.items():
+        declared = {m.document["name"] for m in models}
+        existing = set()
+        async for index in db[collection].list_indexes():
+            existing.add(index["name"])
+
+        usage = {}
+        async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+            accesses = stats["accesses"]
+            if accesses["since"] <= counted_since:
+                usage[stats["name"]] = accesses["ops"]
+
+        report[collection] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared - {"_id_"}),
+            "unused": sorted(
+                name for name in existing & declared if usage.get(name) == 0
+            ),
+        }
+
+    return report
+
+
+async def bootstrap_indexes(db: AsyncIOMotorDatabase):
+    try:
+        await ensure_indexes(db)
+        report = await index_report(db)
+    except Exception:
+        # без Mongo приложение всё равно поднимается, запросы упадут сами
+        logger.exception("Mongo index bootstrap failed")
+        return
+
+    for collection, problems in report.items():
+        for kind, names in problems.items():
+            if names:
+                logger.warning("%s indexes on %s: %s", kind, collection, ", ".join(names))
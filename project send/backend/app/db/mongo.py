@@ -1,5 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
 
-client = AsyncIOMotorClient(settings.MONGO_DSN)
-mongo_db = client["interview_trainer"]
\ No newline at end of file
+client = AsyncIOMotorClient(
+    settings.MONGO_DSN,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
+mongo_db = client["interview_trainer"]
+
+
+def close_mongo():
+    client.close()
@@ -8,6 +8,11 @@ from app.core.config import settings
 engine = create_async_engine(
     settings.POSTGRES_DSN,
     echo=settings.DEBUG,
+    pool_size=settings.POSTGRES_POOL_SIZE,
+    max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+    pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+    pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+    pool_pre_ping=True,
     connect_args={
         "ssl": False,
     },
@@ -21,4 +26,8 @@ AsyncSessionLocal = async_sessionmaker(
 
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def close_postgres():
+    await engine.dispose()
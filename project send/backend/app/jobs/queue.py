@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE = (QUEUED, RUNNING)
+
+
+def serialize_job(job: dict) -> dict:
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def enqueue(
+    mongo: AsyncIOMotorDatabase,
+    kind: str,
+    payload: dict,
+    user_id: str | None = None,
+    dedupe_key: str | None = None,
+    max_attempts: int = 3,
+) -> dict:
+    while True:
+        if dedupe_key:
+            # повторный запрос, пока задача не завершена, получает ту же задачу
+            existing = await mongo.jobs.find_one(
+                {"dedupe_key": dedupe_key, "status": {"$in": ACTIVE}}
+            )
+            if existing:
+                return existing
+
+        try:
+            return await _insert_job(
+                mongo, kind, payload, user_id, dedupe_key, max_attempts
+            )
+        except DuplicateKeyError:
+            # параллельный запрос успел вставить такую же задачу — вернём её
+            continue
+
+
+async def _insert_job(
+    mongo: AsyncIOMotorDatabase,
+    kind: str,
+    payload: dict,
+    user_id: str | None,
+    dedupe_key: str | None,
+    max_attempts: int,
+) -> dict:
+    now = datetime.utcnow()
+    job = {
+        "kind": kind,
+        "payload": payload,
+        "user_id": user_id,
+        "dedupe_key": dedupe_key,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = await mongo.jobs.insert_one(job)
+    job["_id"] = result.inserted_id
+    return job
+
+
+async def get_job(
+    mongo: AsyncIOMotorDatabase,
+    job_id: str,
+    user_id: str | None = None,
+) -> dict | None:
+    try:
+        query: dict = {"_id": ObjectId(job_id)}
+    except InvalidId:
+        return None
+    if user_id is not None:
+        query["user_id"] = user_id
+    return await mongo.jobs.find_one(query, {"payload": 0})
+
+
+async def claim(
+    mongo: AsyncIOMotorDatabase,
+    lease_seconds: float,
+) -> dict | None:
+    now = datetime.utcnow()
+    return await mongo.jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": QUEUED, "run_at": {"$lte": now}},
+                # воркер упал посреди задачи — аренда истекла, забираем заново
+                {"status": RUNNING, "locked_until": {"$lte": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "locked_until": now + timedelta(seconds=lease_seconds),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _lease_filter(job: dict) -> dict:
+    # attempts меняется при каждом claim: воркер с истёкшей арендой
+    # не продлит и не завершит задачу, которую уже забрал другой
+    return {"_id": job["_id"], "status": RUNNING, "attempts": job["attempts"]}
+
+
+async def renew(mongo: AsyncIOMotorDatabase, job: dict, lease_seconds: float) -> bool:
+    now = datetime.utcnow()
+    result = await mongo.jobs.update_one(
+        _lease_filter(job),
+        {"$set": {
+            "locked_until": now + timedelta(seconds=lease_seconds),
+            "updated_at": now,
+        }},
+    )
+    return result.matched_count > 0
+
+
+async def complete(mongo: AsyncIOMotorDatabase, job: dict, result):
+    await mongo.jobs.update_one(
+        _lease_filter(job),
+        {
+            "$set": {
+                "status": DONE,
+                "result": result,
+                "updated_at": datetime.utcnow(),
+            },
+            "$unset": {"locked_until": "", "error": ""},
+        },
+    )
+
+
+async def fail(
+    mongo: AsyncIOMotorDatabase,
+    job: dict,
+    error: str,
+    backoff_seconds: float,
+):
+    now = datetime.utcnow()
+    update: dict = {"error": error, "updated_at": now}
+
+    if job["attempts"] < job.get("max_attempts", 1):
+        # экспоненциальная пауза перед следующей попыткой
+        delay = backoff_seconds * 2 ** (job["attempts"] - 1)
+        update.update(status=QUEUED, run_at=now + timedelta(seconds=delay))
+    else:
+        update["status"] = FAILED
+
+    await mongo.jobs.update_one(
+        _lease_filter(job),
+        {"$set": update, "$unset": {"locked_until": ""}},
+    )
@@ -0,0 +1,60 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.auth.deps import get_current_claims
+from app.chat.streaming import SSE_HEADERS, sse_event
+from app.core.config import settings
+from app.db.deps import get_mongo
+from app.jobs.queue import DONE, FAILED, get_job, serialize_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}")
+async def get_job_status(
+    job_id: str,
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    job = await get_job(mongo, job_id, str(user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    user=Depends(get_current_claims),
+    mongo=Depends(get_mongo),
+):
+    job = await get_job(mongo, job_id, str(user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        current = job
+        last_status = None
+        while True:
+            data = serialize_job(current)
+            if data["status"] in (DONE, FAILED):
+                yield sse_event(data, event=data["status"])
+                return
+
+            # шлём событие только при смене статуса
+            if data["status"] != last_status:
+                last_status = data["status"]
+                yield sse_event(data, event="status")
+
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+            current = await get_job(mongo, job_id, str(user.id))
+            if not current:
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
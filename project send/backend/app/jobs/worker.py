@@ -0,0 +1,142 @@
+"""
+Воркеры фоновых задач из коллекции jobs.
+
+По умолчанию воркеры крутятся внутри приложения (JOB_WORKERS > 0).
+Их можно вынести в отдельный процесс, выставив приложению JOB_WORKERS=0:
+    python -m app.jobs.worker [--concurrency 2]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.jobs.queue import claim, complete, fail, renew
+
+logger = logging.getLogger("app.jobs")
+
+Handler = Callable[[AsyncIOMotorDatabase, dict], Awaitable[object]]
+
+
+class JobWorker:
+    def __init__(
+        self,
+        mongo: AsyncIOMotorDatabase,
+        handlers: dict[str, Handler],
+        concurrency: int = 1,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 300.0,
+        backoff_seconds: float = 5.0,
+    ):
+        self.mongo = mongo
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+
+        self._tasks: list[asyncio.Task] = []
+
+    async def run_once(self) -> bool:
+        job = await claim(self.mongo, self.lease_seconds)
+        if not job:
+            return False
+
+        handler = self.handlers.get(job["kind"])
+        heartbeat = asyncio.create_task(self._keep_lease(job))
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+            result = await handler(self.mongo, job["payload"])
+        except asyncio.CancelledError:
+            # аренда истечёт, и задачу подхватит другой воркер
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job["_id"], job["kind"])
+            await fail(self.mongo, job, repr(exc), self.backoff_seconds)
+        else:
+            await complete(self.mongo, job, result)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        return True
+
+    async def _keep_lease(self, job: dict):
+        # долгая задача (медленная оценка LLM) не должна пережить свою аренду
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await renew(self.mongo, job, self.lease_seconds):
+                    logger.warning("Job %s lease lost", job["_id"])
+                    return
+            except Exception:
+                logger.exception("Job %s lease renewal failed", job["_id"])
+
+    async def _loop(self):
+        while True:
+            try:
+                busy = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Mongo недоступна — не роняем воркер, пробуем позже
+                logger.exception("Job queue poll failed")
+                busy = False
+
+            if not busy:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        for _ in range(self.concurrency - len(self._tasks)):
+            self._tasks.append(asyncio.create_task(self._loop()))
+
+    async def wait(self):
+        await asyncio.gather(*self._tasks)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+def make_worker(mongo: AsyncIOMotorDatabase, concurrency: int) -> JobWorker:
+    from app.chat.evaluation import EVALUATE_CHAT, run_evaluation
+    from app.vacancies.pregenerate import PREGENERATE_QUESTIONS, run_pregeneration
+
+    return JobWorker(
+        mongo,
+        {
+            EVALUATE_CHAT: run_evaluation,
+            PREGENERATE_QUESTIONS: run_pregeneration,
+        },
+        concurrency=concurrency,
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+        lease_seconds=settings.JOB_LEASE_SECONDS,
+        backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS,
+    )
+
+
+async def main(concurrency: int):
+    from app.db.mongo import close_mongo, mongo_db
+    from app.llm.client import qwen_client
+
+    worker = make_worker(mongo_db, concurrency)
+    worker.start()
+    try:
+        await worker.wait()
+    finally:
+        await worker.stop()
+        await qwen_client.aclose()
+        close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=max(settings.JOB_WORKERS, 1))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.concurrency))
@@ -0,0 +1,170 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable
+
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.db.mongo import mongo_db
+from app.llm.client import MODEL, prompt_key, qwen_client
+from app.llm.config import DEFAULT_TEMPERATURE
+from app.llm.scheduler import Priority
+
+
+class LLMCache:
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: int,
+        collection=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.collection = collection
+        self.clock = clock
+
+        # key -> (expires_at, value); порядок = давность использования
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._bytes = 0
+
+    def _get_local(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            self._pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: str):
+        if key in self._entries:
+            self._pop(key)
+
+        self._entries[key] = (self.clock() + self.ttl_seconds, value)
+        self._bytes += len(value.encode("utf-8"))
+
+        # выселяем самые давно использованные записи
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+    async def get(self, key: str) -> str | None:
+        value = self._get_local(key)
+        if value is not None or self.collection is None:
+            return value
+
+        try:
+            doc = await self.collection.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}
+            )
+        except PyMongoError:
+            # общий кэш — только ускорение, его недоступность не ошибка
+            return None
+
+        if not doc:
+            return None
+
+        self._set_local(key, doc["value"])
+        return doc["value"]
+
+    async def set(self, key: str, value: str):
+        self._set_local(key, value)
+        if self.collection is None:
+            return
+
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "value": value,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+        except PyMongoError:
+            pass
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+
+llm_cache = LLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    collection=mongo_db.llm_cache if settings.LLM_CACHE_MONGO else None,
+)
+
+
+async def cached_generate(
+    prompt: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    priority: Priority = Priority.INTERACTIVE,
+    user_id: str | None = None,
+    tag: str = "other",
+) -> str:
+    key = prompt_key(MODEL, prompt, temperature)
+
+    cached = await llm_cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = await qwen_client.generate_raw(
+        prompt,
+        temperature=temperature,
+        priority=priority,
+        user_id=user_id,
+        tag=tag,
+    )
+    text = data.get("response", "")
+    if not text:
+        return "(модель не ответила)"
+
+    await llm_cache.set(key, text)
+    return text
+
+
+async def cached_stream(
+    prompt: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    priority: Priority = Priority.INTERACTIVE,
+    user_id: str | None = None,
+    tag: str = "other",
+) -> AsyncIterator[dict]:
+    key = prompt_key(MODEL, prompt, temperature)
+
+    cached = await llm_cache.get(key)
+    if cached is not None:
+        yield {"response": cached, "done": True}
+        return
+
+    parts = []
+    chunks = qwen_client.stream(
+        prompt,
+        temperature=temperature,
+        priority=priority,
+        user_id=user_id,
+        tag=tag,
+    )
+    async for chunk in chunks:
+        parts.append(chunk.get("response", ""))
+        yield chunk
+
+    text = "".join(parts)
+    if text.strip():
+        await llm_cache.set(key, text)
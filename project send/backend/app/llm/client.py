@@ -1,31 +1,276 @@
+import hashlib
+import json
+import time
+from typing import AsyncIterator
+
 import httpx
 
-OLLAMA_URL = "http://localhost:11434"
-MODEL = "mistral:latest"  
+from app.core.config import settings
+from app.llm.pool import OLLAMA, OPENAI, Backend, LLMPool, parse_backends
+from app.llm.scheduler import LLMScheduler, Priority
+from app.llm.singleflight import SingleFlight
+from app.llm.telemetry import record_call, record_error, record_first_token
+
+MODEL = "mistral:latest"
+
+
+def prompt_key(
+    model: str,
+    prompt: str,
+    temperature: float | None,
+    context: list[int] | None = None,
+    format: dict | str | None = None,
+) -> str:
+    parts: list = [model, prompt, temperature]
+    if context:
+        parts.append(context)
+    if format:
+        parts.append(format)
+    raw = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _openai_payload(payload: dict) -> dict:
+    body = {
+        "model": payload["model"],
+        "prompt": payload["prompt"],
+        "stream": payload["stream"],
+    }
+    temperature = payload.get("options", {}).get("temperature")
+    if temperature is not None:
+        body["temperature"] = temperature
+    return body
+
+
+def _parse_openai_line(line: str) -> dict | None:
+    # OpenAI-совместимые серверы стримят SSE: "data: {...}" и "data: [DONE]"
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return {"response": "", "done": True}
+
+    chunk = json.loads(data)
+    choice = chunk["choices"][0]
+    return {"response": choice.get("text", ""), "done": False}
+
+
+def make_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=settings.LLM_CONNECT_TIMEOUT,
+            read=settings.LLM_READ_TIMEOUT,
+            write=settings.LLM_WRITE_TIMEOUT,
+            pool=settings.LLM_POOL_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        ),
+        http2=settings.LLM_HTTP2,
+    )
+
 
 class OllamaClient:
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=120)
+    def __init__(self, pool: LLMPool | None = None):
+        self.client = make_http_client()
+        self.pool = pool or LLMPool(
+            parse_backends(settings.LLM_BACKENDS),
+            strategy=settings.LLM_BALANCING,
+            failure_threshold=settings.LLM_BREAKER_FAILURES,
+            cooldown_seconds=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+            retries=settings.LLM_RETRIES,
+        )
+        self.flights = SingleFlight()
+        self.scheduler = LLMScheduler(
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            max_queue=settings.LLM_MAX_QUEUE,
+            retry_after=settings.LLM_RETRY_AFTER_SECONDS,
+        )
 
-    async def generate(self, prompt: str) -> str:
-        response = await self.client.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": MODEL,
-                "prompt": prompt,
-                "stream": False,
-            },
+    def start(self):
+        # после shutdown (например, в тестах) поднимаем клиент заново
+        if self.client.is_closed:
+            self.client = make_http_client()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _payload(
+        self,
+        prompt: str,
+        stream: bool,
+        context: list[int] | None = None,
+        temperature: float | None = None,
+        format: dict | str | None = None,
+    ) -> dict:
+        payload = {
+            "model": MODEL,
+            "prompt": prompt,
+            "stream": stream,
+        }
+        if temperature is not None:
+            payload["options"] = {"temperature": temperature}
+        if context:
+            # продолжаем диалог с того места, где остановилась модель
+            payload["context"] = context
+        if format:
+            # "json" или JSON Schema: Ollama ограничивает декодирование форматом
+            payload["format"] = format
+        return payload
+
+    async def generate_raw(
+        self,
+        prompt: str,
+        context: list[int] | None = None,
+        temperature: float | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: str | None = None,
+        tag: str = "other",
+        format: dict | str | None = None,
+    ) -> dict:
+        # одинаковые промпты, пришедшие одновременно, делят один запрос к Ollama
+        key = prompt_key(MODEL, prompt, temperature, context, format)
+        return await self.flights.do(
+            key,
+            lambda: self._post_generate(
+                prompt, context, temperature, priority, user_id, tag, format
+            ),
         )
 
+    async def _post_generate(
+        self,
+        prompt: str,
+        context: list[int] | None,
+        temperature: float | None,
+        priority: Priority,
+        user_id: str | None,
+        tag: str,
+        format: dict | str | None = None,
+    ) -> dict:
+        payload = self._payload(prompt, False, context, temperature, format)
+
+        async with self.scheduler.slot(priority, user_id) as waited:
+            started = time.monotonic()
+            try:
+                data = await self.pool.call(
+                    lambda backend: self._request(backend, payload),
+                    # context — токены Ollama, другие серверы его не поймут
+                    kinds=(OLLAMA,) if context else None,
+                )
+            except Exception:
+                record_error(tag)
+                raise
+
+        record_call(tag, time.monotonic() - started, waited, data)
+        return data
+
+    async def _request(self, backend: Backend, payload: dict) -> dict:
+        if backend.kind == OPENAI:
+            response = await self.client.post(
+                f"{backend.url}/v1/completions",
+                json=_openai_payload(payload),
+            )
+            response.raise_for_status()
+            text = response.json()["choices"][0].get("text", "")
+            return {"response": text, "done": True}
+
+        response = await self.client.post(
+            f"{backend.url}/api/generate",
+            json=payload,
+        )
         response.raise_for_status()
-        data = response.json()
+        return response.json()
 
-        print("OLLAMA RAW RESPONSE:", data)  # 👈 ДОБАВЬ
+    async def generate(
+        self,
+        prompt: str,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: str | None = None,
+        tag: str = "other",
+        format: dict | str | None = None,
+    ) -> str:
+        data = await self.generate_raw(
+            prompt,
+            priority=priority,
+            user_id=user_id,
+            tag=tag,
+            format=format,
+        )
 
         text = data.get("response", "")
         if not text:
             return "(модель не ответила)"
         return text
 
+    async def stream(
+        self,
+        prompt: str,
+        context: list[int] | None = None,
+        temperature: float | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: str | None = None,
+        tag: str = "other",
+        format: dict | str | None = None,
+    ) -> AsyncIterator[dict]:
+        payload = self._payload(prompt, True, context, temperature, format)
+
+        # слот держим, пока модель не допишет ответ
+        async with self.scheduler.slot(priority, user_id) as waited:
+            started = time.monotonic()
+            first = True
+            chunks = self.pool.stream(
+                lambda backend: self._stream_request(backend, payload),
+                kinds=(OLLAMA,) if context else None,
+            )
+            try:
+                async for chunk in chunks:
+                    if first:
+                        record_first_token(tag, time.monotonic() - started)
+                        first = False
+                    if chunk.get("done"):
+                        record_call(tag, time.monotonic() - started, waited, chunk)
+                    yield chunk
+            except Exception:
+                record_error(tag)
+                raise
+
+    async def _stream_request(
+        self,
+        backend: Backend,
+        payload: dict,
+    ) -> AsyncIterator[dict]:
+        if backend.kind == OPENAI:
+            url = f"{backend.url}/v1/completions"
+            body = _openai_payload(payload)
+        else:
+            url = f"{backend.url}/api/generate"
+            body = payload
+
+        async with self.client.stream("POST", url, json=body) as response:
+            response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if not line:
+                    continue
+
+                if backend.kind == OPENAI:
+                    chunk = _parse_openai_line(line)
+                    if chunk is None:
+                        continue
+                else:
+                    # Ollama отдаёт NDJSON: один JSON-объект на строку,
+                    # последний чанк приходит с "done": true и метриками
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise httpx.HTTPError(chunk["error"])
+
+                yield chunk
+
+                if chunk.get("done"):
+                    return
+
 
-qwen_client = OllamaClient()
\ No newline at end of file
+qwen_client = OllamaClient()
@@ -2,6 +2,21 @@
 
 DEFAULT_TEMPERATURE = 0.3
 MAX_TOKENS_QUESTION = 512
+# размер заранее сгенерированного банка вопросов вакансии
+MIN_GENERATED_QUESTIONS = 5
+MAX_GENERATED_QUESTIONS = 15
 MAX_TOKENS_HINT = 256
 MAX_TOKENS_ANSWER = 512
-MAX_TOKENS_EVAL = 1024
\ No newline at end of file
+MAX_TOKENS_EVAL = 1024
+# окно контекста модели (num_ctx); сохранённый context длиннее — протух
+MAX_CONTEXT_TOKENS = 4096
+
+# окно истории для каждого типа промпта:
+# последние keep_turns ходов идут дословно, старое — в краткое содержание
+HISTORY_BUDGETS = {
+    "interview": {"max_tokens": 1500, "keep_turns": 4},
+    "hint": {"max_tokens": 400, "keep_turns": 1},
+    "evaluation": {"max_tokens": 6000, "keep_turns": 15},
+}
+# сколько несвёрнутых сообщений копим перед пересчётом summary
+SUMMARY_REFRESH_MESSAGES = 4
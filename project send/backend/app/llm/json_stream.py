@@ -0,0 +1,141 @@
+import json
+from typing import AsyncIterator, Iterator, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class JsonArrayExtractor:
+    # Достаёт элементы JSON-массива из потока текста по мере того,
+    # как они дописываются. Текст вокруг массива (пояснения, ```json) пропускается,
+    # битые элементы отбрасываются, уже разобранные остаются.
+    # После закрытия массива done=True; resume() продолжает поиск следующего.
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: int | None = None
+        self.done = False
+
+    def feed(self, text: str) -> Iterator:
+        self._buffer += text
+
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+            item = self._step(char)
+            self._pos += 1
+            if item is not None:
+                yield from self._decode(item)
+
+    def _step(self, char: str) -> str | None:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return None
+
+        if self._depth == 0:
+            # ищем начало массива; кавычки в прозе вокруг не учитываем
+            if char == "[":
+                self._depth = 1
+                self._item_start = self._pos + 1
+            return None
+
+        if char == '"':
+            self._in_string = True
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            self._depth -= 1
+            if self._depth == 0:
+                return self._close_array()
+        elif char == "," and self._depth == 1:
+            item = self._buffer[self._item_start:self._pos]
+            self._item_start = self._pos + 1
+            return item
+        return None
+
+    def _close_array(self) -> str:
+        item = self._buffer[self._item_start:self._pos]
+        self._item_start = None
+        self.done = True
+        return item
+
+    def resume(self):
+        self.done = False
+
+    def _decode(self, item: str) -> Iterator:
+        item = item.strip()
+        if not item:
+            return
+        try:
+            yield json.loads(item)
+        except ValueError:
+            return
+
+
+def validate_items(values, model: type[M]) -> Iterator[M]:
+    for value in values:
+        try:
+            yield model.model_validate(value)
+        except ValidationError:
+            # один кривой элемент не должен стоить всей оценки
+            continue
+
+
+async def stream_array(
+    chunks: AsyncIterator[dict],
+    model: type[M],
+) -> AsyncIterator[M]:
+    extractor = JsonArrayExtractor()
+    found = 0
+
+    try:
+        async for chunk in chunks:
+            text = chunk.get("response", "")
+            while True:
+                for item in validate_items(extractor.feed(text), model):
+                    found += 1
+                    yield item
+                text = ""
+
+                if not extractor.done:
+                    break
+                if found:
+                    return
+                # в массиве не нашлось ни одного годного элемента
+                # (например, "[1]" в пояснениях) — ищем следующий
+                extractor.resume()
+    finally:
+        # массив закрыт — обрываем генерацию и сразу отдаём слот LLM
+        await chunks.aclose()
+
+
+def parse_object(text: str, model: type[M]) -> M:
+    # модель может обернуть объект в пояснения или ```json
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("LLM returned no JSON object")
+    try:
+        return model.model_validate_json(text[start:end + 1])
+    except ValidationError:
+        raise ValueError("LLM returned invalid JSON")
+
+
+def response_format(schema: dict) -> dict | str | None:
+    # Ollama >= 0.5 принимает JSON Schema в "format", старые версии — только "json"
+    if settings.LLM_JSON_MODE == "schema":
+        return schema
+    if settings.LLM_JSON_MODE == "json":
+        return "json"
+    return None
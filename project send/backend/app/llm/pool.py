@@ -0,0 +1,202 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+OLLAMA = "ollama"
+OPENAI = "openai"
+
+
+class NoHealthyBackend(Exception):
+    pass
+
+
+class Backend:
+    def __init__(self, url: str, kind: str = OLLAMA):
+        self.url = url.rstrip("/")
+        self.kind = kind
+
+        self.outstanding = 0
+        self.latency_ewma: float | None = None
+        self.failures = 0
+        self.open_until = 0.0
+
+    def __repr__(self):
+        return f"Backend({self.kind}={self.url})"
+
+    def is_available(self, now: float) -> bool:
+        if self.open_until <= 0:
+            return True
+        if now < self.open_until:
+            return False
+        # half-open: после паузы пропускаем один пробный запрос
+        return self.outstanding == 0
+
+
+def parse_backends(spec: str) -> list[Backend]:
+    # "http://a:11434,openai=http://b:8000" — без префикса считаем Ollama
+    backends = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kind, sep, url = item.partition("=")
+        if not sep:
+            kind, url = OLLAMA, item
+        if kind not in (OLLAMA, OPENAI):
+            raise ValueError(f"Unknown LLM backend kind: {kind}")
+        backends.append(Backend(url, kind))
+
+    if not backends:
+        raise ValueError("No LLM backends configured")
+    return backends
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return False
+
+
+class LLMPool:
+    def __init__(
+        self,
+        backends: list[Backend],
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        ewma_alpha: float = 0.3,
+        retries: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if strategy not in ("least_outstanding", "ewma"):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+
+        self.backends = backends
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_alpha = ewma_alpha
+        self.retries = retries
+        self.clock = clock
+
+    def _cost(self, backend: Backend) -> tuple[float, int]:
+        if self.strategy == "ewma":
+            # ещё не замеренный узел считаем быстрым, чтобы он получил трафик
+            latency = backend.latency_ewma or 0.0
+            return latency * (backend.outstanding + 1), backend.outstanding
+        return backend.outstanding, 0
+
+    def pick(
+        self,
+        exclude: Iterable[Backend] = (),
+        kinds: Iterable[str] | None = None,
+    ) -> Backend:
+        now = self.clock()
+        skipped = set(map(id, exclude))
+        allowed = set(kinds) if kinds is not None else None
+
+        candidates = [
+            b for b in self.backends
+            if id(b) not in skipped
+            and (allowed is None or b.kind in allowed)
+            and b.is_available(now)
+        ]
+        if not candidates:
+            raise NoHealthyBackend("No healthy LLM backend available")
+
+        return min(candidates, key=self._cost)
+
+    def record_success(self, backend: Backend, latency: float):
+        backend.failures = 0
+        backend.open_until = 0.0
+        if backend.latency_ewma is None:
+            backend.latency_ewma = latency
+        else:
+            backend.latency_ewma += self.ewma_alpha * (latency - backend.latency_ewma)
+
+    def record_failure(self, backend: Backend):
+        backend.failures += 1
+        if backend.failures >= self.failure_threshold:
+            # размыкаем цепь: узел не получает запросов до конца паузы
+            backend.open_until = self.clock() + self.cooldown_seconds
+
+    @asynccontextmanager
+    async def lease(self, backend: Backend) -> AsyncIterator[Backend]:
+        backend.outstanding += 1
+        started = self.clock()
+        try:
+            yield backend
+        except Exception as exc:
+            if is_retryable(exc):
+                self.record_failure(backend)
+            raise
+        else:
+            self.record_success(backend, self.clock() - started)
+        finally:
+            backend.outstanding -= 1
+
+    async def call(
+        self,
+        fn: Callable[[Backend], Awaitable[T]],
+        idempotent: bool = True,
+        kinds: Iterable[str] | None = None,
+    ) -> T:
+        tried: list[Backend] = []
+        attempts = 1 + (self.retries if idempotent else 0)
+        last_error: Exception | None = None
+
+        while True:
+            try:
+                backend = self.pick(exclude=tried, kinds=kinds)
+            except NoHealthyBackend:
+                if last_error is not None:
+                    raise last_error
+                raise
+
+            tried.append(backend)
+            try:
+                async with self.lease(backend):
+                    return await fn(backend)
+            except Exception as exc:
+                # повторяем на другом узле только сбои самого узла
+                if not is_retryable(exc) or len(tried) >= attempts:
+                    raise
+                last_error = exc
+
+    async def stream(
+        self,
+        fn: Callable[[Backend], AsyncIterator[T]],
+        idempotent: bool = True,
+        kinds: Iterable[str] | None = None,
+    ) -> AsyncIterator[T]:
+        tried: list[Backend] = []
+        attempts = 1 + (self.retries if idempotent else 0)
+        last_error: Exception | None = None
+
+        while True:
+            try:
+                backend = self.pick(exclude=tried, kinds=kinds)
+            except NoHealthyBackend:
+                if last_error is not None:
+                    raise last_error
+                raise
+
+            tried.append(backend)
+            started = False
+            try:
+                async with self.lease(backend):
+                    async for item in fn(backend):
+                        started = True
+                        yield item
+                return
+            except Exception as exc:
+                # после первого чанка переключаться поздно — клиент уже читает ответ
+                if started or not is_retryable(exc) or len(tried) >= attempts:
+                    raise
+                last_error = exc
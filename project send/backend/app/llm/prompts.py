@@ -5,17 +5,15 @@ def interview_greeting(vacancy: str) -> str:
 Ты начинаешь техническое собеседование на позицию: {vacancy}.
 
 ФОРМАТ ОТВЕТА (ОБЯЗАТЕЛЕН):
-1. ОДНО короткое приветственное предложение.
-2. СРАЗУ ОДИН технический вопрос.
+- ОДНО короткое приветственное предложение.
+- БЕЗ вопросов: первый вопрос собеседования будет задан сразу после приветствия.
 
 СТРОГО ЗАПРЕЩЕНО:
-- задавать общие, вводные или поведенческие вопросы
+- задавать любые вопросы
 - спрашивать про опыт, интересы или мотивацию
 - уточнять уровень кандидата
 - предлагать обучение или помощь
 - использовать фразы вида «мы можем», «давай», «попробуем»
-
-Твоя задача — СРАЗУ начать оценку технического уровня.
 """
 
 def hint_prompt(question: str, context: str) -> str:
@@ -100,6 +98,32 @@ def evaluation_prompt(chat_history: str) -> str:
 {chat_history}
 """
 
+def answer_evaluation_prompt(question: str, answer: str) -> str:
+    return f"""
+ТЫ — SENIOR IT-ИНТЕРВЬЮЕР.
+
+Оцени ответ кандидата на ОДИН технический вопрос.
+
+- оцени ответ от 0 до 10
+- дай КРАТКИЙ, КОНКРЕТНЫЙ комментарий
+
+ФОРМАТ ОТВЕТА:
+- СТРОГО валидный JSON-объект
+- БЕЗ любого текста вне JSON
+
+ФОРМАТ:
+{{
+  "score": 0,
+  "feedback": "кратко и по существу"
+}}
+
+Вопрос:
+{question}
+
+Ответ кандидата:
+{answer}
+"""
+
 def interview_system_prompt(vacancy: str, questions: list[str]) -> str:
     qlist = "\n".join(f"{i+1}. {q}" for i, q in enumerate(questions))
 
@@ -184,3 +208,52 @@ def generate_questions_prompt(vacancy_title: str) -> str:
 - БЕЗ пояснений
 - БЕЗ вступительного текста
 """
+
+
+def turn_question_line(question: str | None) -> str:
+    if question:
+        return f"Вопрос, который ты задаёшь сейчас (дословно, без своих вопросов): {question}"
+    return "Вопросы закончились: сообщи, что собеседование завершено, и не задавай новых вопросов."
+
+
+def chat_turn_prompt(history: str, user_text: str, question: str | None) -> str:
+    return f"""
+Ты — опытный технический интервьюер.
+Веди интервью строго и профессионально.
+Задавай только вопросы из списка собеседования, по одному.
+Не объясняй, что ты ИИ.
+
+История диалога:
+{history}
+
+user: {user_text}
+{turn_question_line(question)}
+assistant:
+""".strip()
+
+
+def chat_continue_prompt(new_messages: str, user_text: str, question: str | None) -> str:
+    # инструкции и прошлые реплики уже лежат в сохранённом context модели,
+    # а вопрос на этот ход досылаем каждый раз
+    turn = f"user: {user_text}\n{turn_question_line(question)}\nassistant:"
+    if new_messages:
+        return f"{new_messages}\n{turn}"
+    return turn
+
+
+def summary_prompt(summary: str, new_messages: str) -> str:
+    return f"""
+Ты ведёшь краткий конспект технического собеседования.
+
+Текущий конспект:
+{summary or "(пусто)"}
+
+Новые реплики:
+{new_messages}
+
+ТРЕБОВАНИЯ:
+- дополни конспект новыми репликами
+- сохрани заданные вопросы и суть ответов кандидата
+- не более 10 коротких пунктов
+- без вступлений и выводов
+"""
@@ -0,0 +1,118 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+
+
+class Priority(IntEnum):
+    # меньше — важнее
+    INTERACTIVE = 0  # реплика в интервью, приветствие
+    ASSIST = 1  # подсказка, эталонный ответ
+    EVALUATION = 2  # итоговая оценка
+    BATCH = 3  # генерация вопросов, фоновые задачи
+
+
+class SchedulerOverloaded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("LLM queue is full")
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    def __init__(self, max_in_flight: int, max_queue: int, retry_after: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._heap: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # сколько запросов пользователя сейчас в очереди или в работе
+        self._user_load: defaultdict[str, int] = defaultdict(int)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def raise_if_overloaded(self):
+        if self._waiting >= self.max_queue:
+            raise SchedulerOverloaded(self.retry_after)
+
+    async def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: str | None = None,
+    ) -> float:
+        user = user_id or ""
+
+        if self._in_flight < self.max_in_flight and not self._waiting:
+            self._in_flight += 1
+            self._user_load[user] += 1
+            return 0.0
+
+        self.raise_if_overloaded()
+
+        # честность: внутри одного приоритета запрос пользователя,
+        # у которого уже много запросов в работе, встаёт позже
+        rank = self._user_load[user] if user_id else 0
+        self._user_load[user] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (int(priority), rank, next(self._seq), future))
+        self._waiting += 1
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # слот успели выдать прямо перед отменой — возвращаем его
+                self.release(user_id)
+            else:
+                future.cancel()
+                self._waiting -= 1
+                self._drop_user(user)
+            raise
+
+        return time.monotonic() - started
+
+    def release(self, user_id: str | None = None):
+        self._in_flight -= 1
+        self._drop_user(user_id or "")
+        self._wake_up()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        user_id: str | None = None,
+    ) -> AsyncIterator[float]:
+        waited = await self.acquire(priority, user_id)
+        try:
+            yield waited
+        finally:
+            self.release(user_id)
+
+    def _drop_user(self, user: str):
+        self._user_load[user] -= 1
+        if self._user_load[user] <= 0:
+            del self._user_load[user]
+
+    def _wake_up(self):
+        while self._in_flight < self.max_in_flight and self._heap:
+            *_, future = heapq.heappop(self._heap)
+            if future.cancelled():
+                continue
+
+            self._waiting -= 1
+            self._in_flight += 1
+            future.set_result(None)
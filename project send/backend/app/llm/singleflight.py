@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            # shield: отмена одного ожидающего не должна отменять общий запрос
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            # ушёл последний ожидающий — результат больше никому не нужен
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,116 @@
+import logging
+import random
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.llm")
+
+NS = 1e9
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "Upstream LLM call latency",
+    ["tag"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds",
+    "Time spent waiting for an LLM scheduler slot",
+    ["tag"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "llm_first_token_seconds",
+    "Time to first streamed token",
+    ["tag"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens evaluated (prompt_eval_count)",
+    ["tag"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_OUTPUT_TOKENS = Histogram(
+    "llm_output_tokens",
+    "Generated tokens (eval_count)",
+    ["tag"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_PROMPT_EVAL_SECONDS = Histogram(
+    "llm_prompt_eval_seconds",
+    "Prefill time (prompt_eval_duration)",
+    ["tag"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_EVAL_SECONDS = Histogram(
+    "llm_eval_seconds",
+    "Generation time (eval_duration)",
+    ["tag"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_LOAD_SECONDS = Histogram(
+    "llm_load_seconds",
+    "Model load time (load_duration)",
+    ["tag"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "Generation throughput (eval_count / eval_duration)",
+    ["tag"],
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 150),
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Failed LLM calls",
+    ["tag"],
+)
+
+
+def record_call(tag: str, latency: float, queue_wait: float, data: dict):
+    # только инкременты счётчиков в памяти — не блокирует event loop
+    LLM_REQUEST_SECONDS.labels(tag).observe(latency)
+    LLM_QUEUE_WAIT_SECONDS.labels(tag).observe(queue_wait)
+
+    if "prompt_eval_count" in data:
+        LLM_PROMPT_TOKENS.labels(tag).observe(data["prompt_eval_count"])
+    if "prompt_eval_duration" in data:
+        LLM_PROMPT_EVAL_SECONDS.labels(tag).observe(data["prompt_eval_duration"] / NS)
+    if "load_duration" in data:
+        LLM_LOAD_SECONDS.labels(tag).observe(data["load_duration"] / NS)
+
+    eval_count = data.get("eval_count")
+    eval_duration = data.get("eval_duration")
+    if eval_count is not None:
+        LLM_OUTPUT_TOKENS.labels(tag).observe(eval_count)
+    if eval_duration:
+        LLM_EVAL_SECONDS.labels(tag).observe(eval_duration / NS)
+        if eval_count:
+            LLM_TOKENS_PER_SECOND.labels(tag).observe(eval_count / (eval_duration / NS))
+
+    if settings.LLM_DEBUG_SAMPLE_RATE and random.random() < settings.LLM_DEBUG_SAMPLE_RATE:
+        # без context (тысячи токенов) и с обрезанным текстом ответа
+        logger.debug(
+            "llm call tag=%s latency=%.3fs wait=%.3fs prompt_tokens=%s "
+            "eval_tokens=%s response=%.200r",
+            tag,
+            latency,
+            queue_wait,
+            data.get("prompt_eval_count"),
+            eval_count,
+            data.get("response", ""),
+        )
+
+
+def record_first_token(tag: str, seconds: float):
+    LLM_FIRST_TOKEN_SECONDS.labels(tag).observe(seconds)
+
+
+def record_error(tag: str):
+    LLM_ERRORS.labels(tag).inc()
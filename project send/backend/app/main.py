@@ -1,16 +1,61 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 
 from app.core.config import settings
 from app.auth.router import router as auth_router
 
+from app.chat.greetings import greeting_pool
 from app.chat.router import router as chat_router
+from app.chat.speculative import speculation
+from app.db.indexes import bootstrap_indexes
+from app.db.mongo import close_mongo, mongo_db
+from app.db.postgres import close_postgres
+from app.jobs.router import router as jobs_router
+from app.jobs.worker import make_worker
+from app.llm.client import qwen_client
+from app.llm.scheduler import SchedulerOverloaded
+from app.vacancies.index import vacancy_index, warm_vacancy_index
+from app.vacancies.question_bank import warm_question_bank
+
+
+async def warm_vacancies():
+    await warm_vacancy_index()
+    if settings.GREETING_POOL_WARM:
+        greeting_pool.warm([v.title for v in vacancy_index.entries])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    qwen_client.start()
+    # индексы создаются в фоне, чтобы старт не ждал Mongo
+    indexes = asyncio.create_task(bootstrap_indexes(mongo_db))
+    questions = asyncio.create_task(warm_question_bank())
+    vacancies = asyncio.create_task(warm_vacancies())
+    worker = make_worker(mongo_db, settings.JOB_WORKERS)
+    worker.start()
+    yield
+    indexes.cancel()
+    questions.cancel()
+    vacancies.cancel()
+    await worker.stop()
+    await greeting_pool.aclose()
+    await speculation.aclose()
+    # закрываем пулы соединений, чтобы не бросать сокеты при остановке
+    await qwen_client.aclose()
+    close_mongo()
+    await close_postgres()
 
 
 app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 
@@ -23,13 +68,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # курсор следующей страницы списка чатов
+    expose_headers=["X-Next-Cursor"],
 )
 app.include_router(chat_router)
+app.include_router(jobs_router)
+
+
+# очередь к LLM переполнена — просим клиента повторить позже
+@app.exception_handler(SchedulerOverloaded)
+async def llm_overloaded_handler(request: Request, exc: SchedulerOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "LLM is overloaded, try again later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 # healthcheck
 @app.get("/health")
 async def healthcheck():
     return {"status": "ok"}
 
+
+# метрики для Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # подключаем роутеры ПОСЛЕ создания app
 app.include_router(auth_router)
\ No newline at end of file
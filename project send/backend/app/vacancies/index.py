@@ -0,0 +1,152 @@
+import logging
+import math
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.vacancies.models import Vacancy
+
+logger = logging.getLogger("app.vacancies")
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> list[str]:
+    return WORD_RE.findall(text.lower().replace("ё", "е"))
+
+
+def trigrams(token: str) -> frozenset[str]:
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(frozen=True)
+class VacancyEntry:
+    id: uuid.UUID
+    title: str
+    tokens: tuple[frozenset[str], ...]
+    weights: tuple[float, ...]
+
+
+class VacancyIndex:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: list[VacancyEntry] = []
+        self._expires_at = 0.0
+
+    @property
+    def stale(self) -> bool:
+        return self._expires_at <= self.clock()
+
+    def build(self, vacancies: list[tuple[uuid.UUID, str]]):
+        titles = [(vacancy_id, title, normalize(title)) for vacancy_id, title in vacancies]
+
+        # общие слова («developer», «engineer») весят меньше редких (как IDF в BM25)
+        df: dict[str, int] = {}
+        for _, _, tokens in titles:
+            for token in set(tokens):
+                df[token] = df.get(token, 0) + 1
+
+        self.entries = [
+            VacancyEntry(
+                id=vacancy_id,
+                title=title,
+                tokens=tuple(trigrams(t) for t in tokens),
+                weights=tuple(math.log(1 + len(titles) / df[t]) for t in tokens),
+            )
+            for vacancy_id, title, tokens in titles
+        ]
+        self._expires_at = self.clock() + self.ttl_seconds
+
+    def invalidate(self):
+        self._expires_at = 0.0
+
+    def get(self, title: str) -> VacancyEntry | None:
+        for entry in self.entries:
+            if entry.title == title:
+                return entry
+        return None
+
+    async def refresh(self, db: AsyncSession):
+        rows = (await db.execute(select(Vacancy.id, Vacancy.title))).all()
+        self.build([(row.id, row.title) for row in rows])
+
+    async def ensure_fresh(self, db: AsyncSession):
+        if self.stale:
+            await self.refresh(db)
+
+    def search(self, text: str, limit: int = 5) -> list[tuple[float, VacancyEntry]]:
+        words = [trigrams(t) for t in set(normalize(text))]
+        if not words:
+            return []
+
+        scored = []
+        for entry in self.entries:
+            if not entry.tokens:
+                continue
+            # каждому слову названия — самое похожее слово сообщения:
+            # опечатки и падежи («разработчика») почти не снижают оценку
+            score = sum(
+                weight * max(similarity(token, word) for word in words)
+                for token, weight in zip(entry.tokens, entry.weights)
+            ) / sum(entry.weights)
+            scored.append((score, entry))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:limit]
+
+    def match(self, text: str) -> VacancyEntry | None:
+        # уверенный матч: высокий балл и отрыв от второго кандидата
+        found = self.search(text, limit=2)
+        if not found:
+            return None
+
+        best_score, best = found[0]
+        second_score = found[1][0] if len(found) > 1 else 0.0
+        if (
+            best_score >= settings.VACANCY_MATCH_THRESHOLD
+            and best_score - second_score >= settings.VACANCY_MATCH_MARGIN
+        ):
+            return best
+        return None
+
+
+vacancy_index = VacancyIndex(ttl_seconds=settings.VACANCY_INDEX_TTL_SECONDS)
+
+
+async def warm_vacancy_index():
+    from app.db.postgres import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await vacancy_index.refresh(db)
+    except Exception:
+        logger.exception("Vacancy index warm-up failed")
+        return
+
+    logger.info("Vacancy index warmed: %d vacancies", len(vacancy_index.entries))
+
+
+# изменения каталога через ORM перестраивают индекс при следующем запросе
+@event.listens_for(Vacancy, "after_insert")
+@event.listens_for(Vacancy, "after_update")
+@event.listens_for(Vacancy, "after_delete")
+def _invalidate_index(mapper, connection, target: Vacancy):
+    vacancy_index.invalidate()
@@ -0,0 +1,172 @@
+"""
+Заранее генерирует банки вопросов для вакансий и публикует их новой версией
+в таблицу questions, чтобы новое интервью не ждало генерации.
+
+Запуск из каталога backend:
+    python -m app.vacancies.pregenerate [--vacancy "Python Developer" ...] [--force]
+
+Без --force обрабатываются только вакансии, у которых ещё нет вопросов.
+Набор, совпадающий с текущей версией, повторно не публикуется.
+"""
+import argparse
+import asyncio
+import logging
+import re
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.jobs.queue import enqueue
+from app.llm.client import qwen_client
+from app.llm.config import MAX_GENERATED_QUESTIONS, MIN_GENERATED_QUESTIONS
+from app.llm.prompts import generate_questions_prompt
+from app.llm.scheduler import Priority
+from app.vacancies.index import normalize
+from app.vacancies.models import Vacancy
+from app.vacancies.questions_models import Question
+
+logger = logging.getLogger("app.vacancies")
+
+PREGENERATE_QUESTIONS = "pregenerate_questions"
+
+BULLET_RE = re.compile(r"^\s*(?:[-•*]|\d+[.)])\s*")
+
+
+def question_key(text: str) -> str:
+    return " ".join(normalize(text))
+
+
+def parse_questions(raw: str) -> list[str]:
+    questions = []
+    seen = set()
+    for line in raw.splitlines():
+        # модель иногда нумерует вопросы вопреки промпту
+        text = BULLET_RE.sub("", line).strip()
+        key = question_key(text)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        questions.append(text)
+
+    return questions[:MAX_GENERATED_QUESTIONS]
+
+
+async def generate_questions(vacancy_title: str) -> list[str]:
+    raw = await qwen_client.generate(
+        generate_questions_prompt(vacancy_title),
+        priority=Priority.BATCH,
+        tag="questions",
+    )
+
+    questions = parse_questions(raw)
+    if len(questions) < MIN_GENERATED_QUESTIONS:
+        raise ValueError(f"LLM returned {len(questions)} questions for {vacancy_title}")
+    return questions
+
+
+async def publish_questions(
+    db: AsyncSession,
+    vacancy: Vacancy,
+    questions: list[str],
+) -> int | None:
+    latest = (
+        select(func.max(Question.version))
+        .where(Question.vacancy_id == vacancy.id)
+        .scalar_subquery()
+    )
+    rows = (
+        await db.execute(
+            select(Question.question, Question.version).where(
+                Question.vacancy_id == vacancy.id,
+                Question.version == latest,
+            )
+        )
+    ).all()
+
+    version = rows[0].version if rows else 0
+    if {question_key(r.question) for r in rows} == {question_key(q) for q in questions}:
+        return None
+
+    # через ORM, чтобы банк вопросов сбросил старую версию
+    db.add_all([
+        Question(vacancy_id=vacancy.id, question=text, version=version + 1)
+        for text in questions
+    ])
+    await db.commit()
+    return version + 1
+
+
+async def pregenerate(
+    db: AsyncSession,
+    titles: list[str] | None = None,
+    force: bool = False,
+) -> dict[str, dict]:
+    query = select(Vacancy).order_by(Vacancy.title)
+    if titles:
+        query = query.where(Vacancy.title.in_(titles))
+    if not force:
+        query = query.where(~exists().where(Question.vacancy_id == Vacancy.id))
+
+    vacancies = (await db.execute(query)).scalars().all()
+
+    published, failed = {}, {}
+    for vacancy in vacancies:
+        # неудачный ответ модели по одной вакансии не должен останавливать остальные
+        try:
+            questions = await generate_questions(vacancy.title)
+        except ValueError as exc:
+            logger.warning("Question generation for %s failed: %s", vacancy.title, exc)
+            failed[vacancy.title] = str(exc)
+            continue
+        published[vacancy.title] = await publish_questions(db, vacancy, questions)
+    return {"published": published, "failed": failed}
+
+
+async def enqueue_pregeneration(mongo: AsyncIOMotorDatabase, vacancy_title: str) -> dict:
+    return await enqueue(
+        mongo,
+        PREGENERATE_QUESTIONS,
+        {"vacancy_title": vacancy_title},
+        dedupe_key=f"{PREGENERATE_QUESTIONS}:{vacancy_title}",
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+async def run_pregeneration(mongo: AsyncIOMotorDatabase, payload: dict) -> dict:
+    from app.db.postgres import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        result = await pregenerate(db, [payload["vacancy_title"]])
+
+    # задача про одну вакансию: ошибку отдаём очереди, чтобы она повторила попытку
+    if result["failed"]:
+        raise ValueError(result["failed"][payload["vacancy_title"]])
+    return result
+
+
+async def main(titles: list[str] | None, force: bool):
+    from app.db.postgres import AsyncSessionLocal, close_postgres
+
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await pregenerate(db, titles, force)
+    finally:
+        await qwen_client.aclose()
+        await close_postgres()
+
+    for title, version in result["published"].items():
+        status = f"version {version}" if version else "unchanged"
+        print(f"{title}: {status}")
+    for title, error in result["failed"].items():
+        print(f"{title}: failed ({error})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vacancy", action="append", dest="titles")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.titles, args.force))
@@ -0,0 +1,160 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.vacancies.models import Vacancy
+from app.vacancies.questions_models import Question
+
+logger = logging.getLogger("app.vacancies")
+
+
+@dataclass(frozen=True)
+class VacancyQuestions:
+    id: uuid.UUID
+    title: str
+    version: int
+    # (question_id, text) только последней версии
+    questions: tuple[tuple[str, str], ...]
+
+    def questions_state(self) -> list[dict]:
+        # каждому чату — свои копии, их состояние меняется по ходу интервью
+        return [
+            {
+                "question_id": question_id,
+                "text": text,
+                "used": False,
+                "mistakes": False,
+                "score": None,
+            }
+            for question_id, text in self.questions
+        ]
+
+
+def latest_questions_query(vacancy_title: str | None = None):
+    # одна выборка: номер версии по убыванию внутри вакансии, берём первую
+    rank = func.dense_rank().over(
+        partition_by=Question.vacancy_id,
+        order_by=Question.version.desc(),
+    )
+    ranked = (
+        select(
+            Vacancy.id.label("vacancy_id"),
+            Vacancy.title.label("vacancy_title"),
+            Question.id.label("question_id"),
+            Question.question,
+            Question.version,
+            rank.label("rank"),
+        )
+        .join(Question, Question.vacancy_id == Vacancy.id)
+    )
+    if vacancy_title is not None:
+        ranked = ranked.where(Vacancy.title == vacancy_title)
+
+    ranked = ranked.subquery()
+    return (
+        select(ranked)
+        .where(ranked.c.rank == 1)
+        .order_by(ranked.c.vacancy_id, ranked.c.question_id)
+    )
+
+
+def group_rows(rows) -> list[VacancyQuestions]:
+    grouped: dict[uuid.UUID, list] = {}
+    for row in rows:
+        grouped.setdefault(row.vacancy_id, []).append(row)
+
+    return [
+        VacancyQuestions(
+            id=vacancy_id,
+            title=items[0].vacancy_title,
+            version=items[0].version,
+            questions=tuple((str(r.question_id), r.question) for r in items),
+        )
+        for vacancy_id, items in grouped.items()
+    ]
+
+
+class QuestionBank:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        # title -> (expires_at, набор вопросов)
+        self._entries: dict[str, tuple[float, VacancyQuestions]] = {}
+
+    def get(self, vacancy_title: str) -> VacancyQuestions | None:
+        entry = self._entries.get(vacancy_title)
+        if entry is None:
+            return None
+
+        expires_at, questions = entry
+        if expires_at <= self.clock():
+            del self._entries[vacancy_title]
+            return None
+        return questions
+
+    def put(self, questions: VacancyQuestions):
+        self._entries[questions.title] = (self.clock() + self.ttl_seconds, questions)
+
+    def invalidate(self, vacancy_id: uuid.UUID):
+        for title, (_, questions) in list(self._entries.items()):
+            if questions.id == vacancy_id:
+                del self._entries[title]
+
+    def clear(self):
+        self._entries.clear()
+
+    async def load(self, db: AsyncSession, vacancy_title: str) -> VacancyQuestions | None:
+        cached = self.get(vacancy_title)
+        if cached is not None:
+            return cached
+
+        rows = (await db.execute(latest_questions_query(vacancy_title))).all()
+        sets = group_rows(rows)
+        if not sets:
+            return None
+
+        self.put(sets[0])
+        return sets[0]
+
+    async def warm(self, db: AsyncSession) -> int:
+        rows = (await db.execute(latest_questions_query())).all()
+        sets = group_rows(rows)
+        for questions in sets:
+            self.put(questions)
+        return len(sets)
+
+
+question_bank = QuestionBank(ttl_seconds=settings.QUESTION_BANK_TTL_SECONDS)
+
+
+async def warm_question_bank():
+    from app.db.postgres import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as db:
+            count = await question_bank.warm(db)
+    except Exception:
+        # без Postgres приложение всё равно поднимается, банк наполнится по запросам
+        logger.exception("Question bank warm-up failed")
+        return
+
+    logger.info("Question bank warmed: %d vacancies", count)
+
+
+# публикация новой версии через ORM сбрасывает набор вакансии;
+# записи мимо ORM (SQL-скрипты) подхватятся по TTL
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_update")
+@event.listens_for(Question, "after_delete")
+def _invalidate_vacancy(mapper, connection, target: Question):
+    question_bank.invalidate(target.vacancy_id)
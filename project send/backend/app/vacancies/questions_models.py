@@ -1,11 +1,15 @@
 import uuid
-from sqlalchemy import ForeignKey, Integer, Text
+from sqlalchemy import ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # выборка последней версии вопросов вакансии
+        Index("ix_questions_vacancy_id_version", "vacancy_id", "version"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         primary_key=True,
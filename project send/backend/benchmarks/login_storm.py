@@ -0,0 +1,85 @@
+"""
+Как шторм логинов влияет на задержку чата.
+
+Имитируем чат-запросы (короткие корутины, которые должны просыпаться
+каждые 10 мс) и параллельно гоняем N проверок пароля Argon2:
+сначала прямо в event loop, как было раньше, потом через пул потоков.
+
+Запуск из каталога backend:
+    python -m benchmarks.login_storm --logins 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.auth.security import (
+    hash_password,
+    pwd_context,
+    verify_and_update_async,
+)
+
+TICK = 0.01
+
+
+async def chat_traffic(stop: asyncio.Event, latencies: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        latencies.append(time.perf_counter() - started - TICK)
+
+
+async def inline_login(password: str, password_hash: str):
+    pwd_context.verify_and_update(password, password_hash)
+
+
+async def offloaded_login(password: str, password_hash: str):
+    await verify_and_update_async(password, password_hash)
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(login, logins: int, users: int) -> dict:
+    password = "Test12345"
+    password_hash = hash_password(password)
+
+    stop = asyncio.Event()
+    latencies: list[float] = []
+    chats = [asyncio.create_task(chat_traffic(stop, latencies)) for _ in range(users)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login(password, password_hash) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await asyncio.gather(*chats)
+
+    return {
+        "logins_per_sec": logins / elapsed,
+        "chat_p50_ms": statistics.median(latencies) * 1000,
+        "chat_p99_ms": percentile(latencies, 0.99) * 1000,
+        "chat_max_ms": max(latencies) * 1000,
+    }
+
+
+async def main(logins: int, users: int):
+    for name, login in (("inline", inline_login), ("executor", offloaded_login)):
+        result = await run(login, logins, users)
+        print(
+            f"{name:>8}: {result['logins_per_sec']:6.1f} logins/s | "
+            f"chat p50 {result['chat_p50_ms']:7.1f} ms | "
+            f"p99 {result['chat_p99_ms']:7.1f} ms | "
+            f"max {result['chat_max_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=30)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.logins, args.users))
@@ -7,8 +7,7 @@ from app.main import app
 from app.users.models import User
 import uuid
 
-from app.main import app
-from app.auth.deps import get_current_user
+from app.auth.deps import get_current_user, get_current_claims
 
 
 class FakeUser:
@@ -29,6 +28,7 @@ def override_auth():
         )
 
     app.dependency_overrides[get_current_user] = fake_user
+    app.dependency_overrides[get_current_claims] = fake_user
     yield
     app.dependency_overrides.clear()
 
@@ -63,4 +63,26 @@ class FakeMongo:
 def override_mongo():
     app.dependency_overrides[get_mongo] = lambda: FakeMongo()
     yield
-    app.dependency_overrides.pop(get_mongo, None)
\ No newline at end of file
+    app.dependency_overrides.pop(get_mongo, None)
+
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+
+
+@pytest.fixture
+async def real_mongo():
+    # тесты на настоящей Mongo пропускаются, если она не запущена
+    mongo_client = AsyncIOMotorClient(settings.MONGO_DSN, serverSelectionTimeoutMS=500)
+    try:
+        await mongo_client.admin.command("ping")
+    except PyMongoError:
+        mongo_client.close()
+        pytest.skip("MongoDB is not available")
+
+    db = mongo_client["interview_trainer_test"]
+    await mongo_client.drop_database(db.name)
+    yield db
+    await mongo_client.drop_database(db.name)
+    mongo_client.close()
@@ -1,6 +1,9 @@
 import pytest
 from bson import ObjectId
 
+from app.db.postgres import get_db
+from app.main import app
+
 
 
 
@@ -14,4 +17,87 @@ async def test_chat_new_ok(client, override_auth, override_mongo):
 @pytest.mark.asyncio
 async def test_health(client):
     r = await client.get("/health")
-    assert r.status_code == 200
\ No newline at end of file
+    assert r.status_code == 200
+
+@pytest.fixture
+def fake_turn(monkeypatch, override_mongo):
+    from app.chat import router
+
+    scored = []
+
+    async def fake_transcript(mongo, chat_id, user_id, with_question=False):
+        return {
+            "chat_id": chat_id,
+            "finished": False,
+            "version": 0,
+            "messages": [],
+            "question": {"question_id": "1", "text": "Что такое GIL?", "index": 0},
+        }
+
+    async def fake_generate_raw(prompt, **kwargs):
+        return {"response": "Продолжим."}
+
+    async def fake_commit_turn(*args, **kwargs):
+        return True
+
+    async def fake_score_answer(mongo, chat_id, question, answer, user_id):
+        scored.append(answer)
+
+    monkeypatch.setattr(router, "get_transcript", fake_transcript)
+    monkeypatch.setattr(router, "commit_turn", fake_commit_turn)
+    monkeypatch.setattr(router, "score_answer", fake_score_answer)
+    monkeypatch.setattr(router.qwen_client, "generate_raw", fake_generate_raw)
+    return scored
+
+
+@pytest.mark.asyncio
+async def test_control_message_is_not_scored(client, fake_turn):
+    chat_id = str(ObjectId())
+
+    r = await client.post(f"/chat/{chat_id}/message", json={"content": "Дай подсказку"})
+    assert r.status_code == 200
+    assert fake_turn == []
+
+    answer = "GIL не даёт потокам одновременно исполнять байткод"
+    r = await client.post(f"/chat/{chat_id}/message", json={"content": answer})
+    assert r.status_code == 200
+    assert fake_turn == [answer]
+
+
+@pytest.mark.asyncio
+async def test_new_chat_detects_vacancy_from_message(client, monkeypatch, override_mongo):
+    from types import SimpleNamespace
+
+    from app.chat import router
+
+    detected = []
+
+    async def fake_detect_vacancy(message, db):
+        detected.append(message)
+        return SimpleNamespace(title="Python Developer")
+
+    async def fake_load_questions(db, title):
+        vacancy = SimpleNamespace(id="v1", title=title)
+        return vacancy, [{"question_id": "1", "text": "Q1", "used": False}], 1
+
+    async def fake_create_chat(mongo, user_id, vacancy_id, title, questions, version):
+        return {"chat_id": "c1", "vacancy_title": title}
+
+    async def fake_append_message(*args):
+        pass
+
+    async def fake_db():
+        yield None
+
+    monkeypatch.setattr(router, "detect_vacancy", fake_detect_vacancy)
+    monkeypatch.setattr(router, "load_questions_for_vacancy", fake_load_questions)
+    monkeypatch.setattr(router, "create_chat", fake_create_chat)
+    monkeypatch.setattr(router, "append_message", fake_append_message)
+    monkeypatch.setattr(router.greeting_pool, "take", lambda title: f"Привет, {title}")
+    app.dependency_overrides[get_db] = fake_db
+
+    r = await client.post("/chat/new", json={"message": "хочу на питониста"})
+
+    assert r.status_code == 200
+    assert r.json() == {"chat_id": "c1", "greeting": "Привет, Python Developer\n\nQ1"}
+    assert detected == ["хочу на питониста"]
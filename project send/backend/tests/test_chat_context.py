@@ -0,0 +1,67 @@
+from app.chat.context import build_turn_prompt, context_is_fresh
+from app.llm.client import MODEL
+from app.llm.config import MAX_CONTEXT_TOKENS
+
+
+def make_chat(**kwargs):
+    chat = {
+        "messages": [
+            {"role": "assistant", "content": "Q1"},
+            {"role": "user", "content": "A1"},
+        ],
+        "llm_context": [1, 2, 3],
+        "llm_context_model": MODEL,
+        "llm_context_messages": 2,
+        "question": {"question_id": "1", "text": "Что такое GIL?", "index": 0},
+        "next_question": {"question_id": "2", "text": "Что такое MRO?", "index": 1},
+    }
+    chat.update(kwargs)
+    return chat
+
+
+def test_fresh_context_sends_only_new_text():
+    prompt, context = build_turn_prompt(make_chat(), "A2")
+
+    assert context == [1, 2, 3]
+    assert prompt.startswith("user: A2\n")
+    assert prompt.endswith("\nassistant:")
+
+
+def test_missed_messages_are_prepended():
+    chat = make_chat()
+    chat["messages"].append({"role": "assistant", "content": "hint"})
+
+    prompt, context = build_turn_prompt(chat, "A2")
+
+    assert context == [1, 2, 3]
+    assert prompt.startswith("assistant: hint\n")
+
+
+def test_no_context_rebuilds_history():
+    prompt, context = build_turn_prompt(make_chat(llm_context=None), "A2")
+
+    assert context is None
+    assert "user: A1" in prompt
+
+
+def test_prompt_carries_bank_question():
+    # реплика не ответ — интервьюер остаётся на текущем вопросе
+    prompt, _ = build_turn_prompt(make_chat(), "Дай подсказку")
+    assert "Что такое GIL?" in prompt
+    assert "Что такое MRO?" not in prompt
+
+    # ответ засчитан — задаётся следующий вопрос банка
+    prompt, _ = build_turn_prompt(make_chat(llm_context=None), "A2", answered=True)
+    assert "Что такое MRO?" in prompt
+
+
+def test_prompt_finishes_after_last_question():
+    prompt, _ = build_turn_prompt(make_chat(next_question=None), "A2", answered=True)
+    assert "собеседование завершено" in prompt
+
+
+def test_stale_context():
+    assert not context_is_fresh(make_chat(llm_context_model="other"))
+    assert not context_is_fresh(make_chat(llm_context=[0] * MAX_CONTEXT_TOKENS))
+    assert not context_is_fresh(make_chat(messages=[]))
+    assert context_is_fresh(make_chat())
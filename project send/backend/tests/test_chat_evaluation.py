@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+
+from app.chat import evaluation
+from app.chat.evaluation import (
+    aggregate_evaluation,
+    is_answer,
+    pending_questions,
+    run_evaluation,
+    score_answer,
+)
+from app.chat.repository import get_chat_questions
+
+
+def test_aggregate_skips_unanswered_and_pending():
+    questions = [
+        {"question_id": "1", "text": "Q1", "answer": "a", "score": 7, "feedback": "ok"},
+        {"question_id": "2", "text": "Q2", "answer": "b", "score": None},
+        {"question_id": "3", "text": "Q3", "used": False, "score": None},
+    ]
+
+    assert aggregate_evaluation(questions) == [
+        {"question_id": "1", "question": "Q1", "score": 7, "feedback": "ok"},
+    ]
+    assert [q["question_id"] for q in pending_questions(questions)] == ["2"]
+
+
+@pytest.fixture
+def fake_scorer(monkeypatch):
+    calls = []
+
+    async def fake_evaluate_answer(question, answer, user_id=None):
+        calls.append((question, answer))
+        return {"score": len(answer), "feedback": "f"}
+
+    monkeypatch.setattr(evaluation, "evaluate_answer", fake_evaluate_answer)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_answers_are_scored_incrementally(real_mongo, fake_scorer):
+    result = await real_mongo.chats.insert_one({
+        "user_id": "u",
+        "created_at": datetime.utcnow(),
+        "questions": [
+            {"question_id": "1", "text": "Q1", "used": False, "score": None, "mistakes": False},
+            {"question_id": "2", "text": "Q2", "used": False, "score": None, "mistakes": False},
+        ],
+        "question_positions": {"1": 0, "2": 1},
+        "current_question_index": 0,
+    })
+    chat_id = str(result.inserted_id)
+
+    question = {"question_id": "1", "text": "Q1", "index": 0}
+    await score_answer(real_mongo, chat_id, question, "abc", "u")
+
+    chat = await get_chat_questions(real_mongo, chat_id, "u")
+    first = chat["questions"][0]
+    assert first["used"] is True
+    assert (first["score"], first["mistakes"]) == (3, True)
+
+    # ответ, который не успели оценить, дооценивает задача завершения
+    await real_mongo.chats.update_one(
+        {"_id": result.inserted_id},
+        {"$set": {"questions.1.used": True, "questions.1.answer": "abcdefghij"}},
+    )
+    scores = await run_evaluation(real_mongo, {"chat_id": chat_id, "user_id": "u"})
+
+    assert [s["score"] for s in scores] == [3, 10]
+    assert fake_scorer == [("Q1", "abc"), ("Q2", "abcdefghij")]
+
+
+@pytest.mark.parametrize("text", [
+    "Дай подсказку",
+    "Дай идеальный ответ",
+    "Заверши интервью и дай оценку",
+    "а что имеется в виду под GIL?",
+    "не знаю",
+])
+def test_non_answers_are_not_scored(text):
+    assert not is_answer(text)
+
+
+def test_answer_detection():
+    assert is_answer("GIL не даёт потокам одновременно исполнять байткод")
+    # явная отметка клиента важнее эвристики
+    assert is_answer("O(1)", True)
+    assert not is_answer("GIL не даёт потокам исполнять байткод", False)
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.chat import history
+from app.chat.history import build_history, count_tokens, needs_summary, refresh_summary
+from app.llm.config import HISTORY_BUDGETS
+from app.llm.scheduler import SchedulerOverloaded
+
+
+def make_messages(n):
+    return [
+        {"role": "user" if i % 2 else "assistant", "content": f"m{i}"}
+        for i in range(n)
+    ]
+
+
+def test_count_tokens():
+    assert count_tokens("привет, мир") == 3
+    assert count_tokens("") == 0
+
+
+def test_short_history_is_verbatim():
+    chat = {"messages": make_messages(3)}
+
+    history = build_history(chat, "interview")
+
+    assert history == "assistant: m0\nuser: m1\nassistant: m2"
+
+
+def test_long_history_uses_summary_and_window():
+    keep = HISTORY_BUDGETS["interview"]["keep_turns"] * 2
+    chat = {
+        "messages": make_messages(keep + 6),
+        "history_summary": {"text": "конспект", "covered": 6},
+    }
+
+    history = build_history(chat, "interview")
+
+    assert history.startswith("Краткое содержание начала:\nконспект")
+    assert "m5" not in history
+    assert f"m{keep + 5}" in history
+
+
+def test_history_respects_token_budget():
+    long = "слово " * HISTORY_BUDGETS["hint"]["max_tokens"]
+    chat = {"messages": [
+        {"role": "user", "content": long},
+        {"role": "assistant", "content": "вопрос"},
+    ]}
+
+    history = build_history(chat, "hint")
+
+    assert history == "assistant: вопрос"
+
+
+def test_reset_history_ignores_summary():
+    chat = {
+        "messages": make_messages(2),
+        "history_summary": {"text": "старый", "covered": 40},
+    }
+
+    assert "старый" not in build_history(chat, "interview")
+    assert not needs_summary(chat)
+
+
+def test_needs_summary():
+    keep = HISTORY_BUDGETS["interview"]["keep_turns"] * 2
+
+    assert not needs_summary({"messages": make_messages(keep)})
+    assert needs_summary({"messages": make_messages(keep + 4)})
+
+
+class FakeChats:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append(update)
+
+
+@pytest.mark.asyncio
+async def test_refresh_summary_skips_empty_and_failed_responses(monkeypatch):
+    keep = HISTORY_BUDGETS["interview"]["keep_turns"] * 2
+    chat = {"messages": make_messages(keep + 4)}
+    mongo = SimpleNamespace(chats=FakeChats())
+    chat_id = str(ObjectId())
+    responses = [{"response": "  "}, SchedulerOverloaded(5), {"response": "конспект"}]
+
+    async def fake_generate_raw(prompt, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(history.qwen_client, "generate_raw", fake_generate_raw)
+
+    await refresh_summary(mongo, chat_id, chat)
+    await refresh_summary(mongo, chat_id, chat)
+    assert mongo.chats.updates == []
+
+    await refresh_summary(mongo, chat_id, chat)
+    assert mongo.chats.updates == [
+        {"$set": {"history_summary": {"text": "конспект", "covered": 4}}}
+    ]
@@ -0,0 +1,243 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.chat import migrate_questions
+from app.chat.migrate_messages import migrate
+from app.chat.repository import (
+    append_message,
+    commit_turn,
+    decode_cursor,
+    encode_cursor,
+    get_chat,
+    get_chat_header,
+    get_chat_question,
+    get_transcript,
+    iter_chats,
+    list_chats,
+    list_messages,
+    llm_context_update,
+    new_message,
+    save_answer,
+    save_evaluation,
+)
+
+
+def test_cursor_roundtrip():
+    now = datetime(2024, 1, 2, 3, 4, 5, 678000)
+    oid = ObjectId()
+
+    assert decode_cursor(encode_cursor(now, oid)) == (now, oid)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_messages_pagination(real_mongo):
+    result = await real_mongo.chats.insert_one({"user_id": "u", "created_at": datetime.utcnow()})
+    chat_id = str(result.inserted_id)
+    for i in range(5):
+        await append_message(real_mongo, chat_id, "user", f"m{i}")
+
+    page, cursor = await list_messages(real_mongo, chat_id, limit=2)
+    seen = [m["content"] for m in page]
+    while cursor:
+        page, cursor = await list_messages(real_mongo, chat_id, cursor, limit=2)
+        seen += [m["content"] for m in page]
+
+    assert seen == [f"m{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_get_chat_skips_transcript(real_mongo):
+    result = await real_mongo.chats.insert_one({"user_id": "u", "created_at": datetime.utcnow()})
+    chat_id = str(result.inserted_id)
+    await append_message(real_mongo, chat_id, "user", "hi")
+
+    assert "messages" not in await get_chat(real_mongo, chat_id, "u")
+    full = await get_chat(real_mongo, chat_id, "u", with_messages=True)
+    assert [m["content"] for m in full["messages"]] == ["hi"]
+
+
+@pytest.mark.asyncio
+async def test_migration_is_idempotent(real_mongo):
+    now = datetime.utcnow()
+    result = await real_mongo.chats.insert_one({
+        "user_id": "u",
+        "created_at": now,
+        "messages": [
+            {"role": "assistant", "content": "q", "timestamp": now},
+            {"role": "user", "content": "a", "timestamp": now},
+        ],
+    })
+
+    assert await migrate(real_mongo) == (1, 2)
+    assert await migrate(real_mongo) == (0, 0)
+
+    chat = await get_chat(real_mongo, str(result.inserted_id), "u", with_messages=True)
+    assert [m["content"] for m in chat["messages"]] == ["q", "a"]
+
+
+async def _chat_with_questions(mongo) -> str:
+    result = await mongo.chats.insert_one({
+        "user_id": "u",
+        "vacancy_title": "Python",
+        "finished": False,
+        "created_at": datetime.utcnow(),
+        "questions": [
+            {"question_id": "1", "text": "Q1", "used": True, "score": None, "mistakes": False},
+            {"question_id": "2", "text": "Q2", "used": False, "score": None, "mistakes": False},
+            {"question_id": "3", "text": "Q3", "used": False, "score": None, "mistakes": False},
+        ],
+        "question_positions": {"1": 0, "2": 1, "3": 2},
+        "current_question_index": 1,
+        "llm_context": [1, 2, 3],
+    })
+    return str(result.inserted_id)
+
+
+@pytest.mark.asyncio
+async def test_read_models_project_only_needed_fields(real_mongo):
+    chat_id = await _chat_with_questions(real_mongo)
+    await append_message(real_mongo, chat_id, "user", "hi")
+
+    header = await get_chat_header(real_mongo, chat_id, "u")
+    assert header["vacancy_title"] == "Python"
+    assert "questions" not in header and "llm_context" not in header
+
+    current = await get_chat_question(real_mongo, chat_id, "u")
+    assert current["question"]["question_id"] == "2"
+    assert current["question"]["index"] == 1
+
+    transcript = await get_transcript(real_mongo, chat_id, "u", with_question=True)
+    assert "questions" not in transcript
+    assert transcript["question"]["question_id"] == "2"
+    assert transcript["next_question"]["question_id"] == "3"
+    assert transcript["llm_context"] == [1, 2, 3]
+    assert [m["content"] for m in transcript["messages"]] == ["hi"]
+
+    assert await get_chat_header(real_mongo, chat_id, "other") is None
+
+
+@pytest.mark.asyncio
+async def test_chat_with_messages_hides_internal_fields(real_mongo):
+    chat_id = await _chat_with_questions(real_mongo)
+
+    chat = await get_chat(real_mongo, chat_id, "u", with_messages=True)
+    assert [q["question_id"] for q in chat["questions"]] == ["1", "2", "3"]
+    for field in ("llm_context", "question_positions", "current_question_index", "version"):
+        assert field not in chat
+
+
+@pytest.mark.asyncio
+async def test_save_evaluation(real_mongo):
+    chat_id = await _chat_with_questions(real_mongo)
+    chat = await get_chat(real_mongo, chat_id, "u")
+
+    await save_evaluation(real_mongo, chat_id, [
+        {"question_id": "1", "question": "Q1", "score": 4},
+        {"question_id": "3", "question": "Q3", "score": 10},
+        # оценка переписки целиком приходит без id — находим вопрос по тексту
+        {"question": "Q2", "score": 8},
+    ], chat["questions"])
+
+    chat = await get_chat(real_mongo, chat_id, "u")
+    assert chat["finished"] is True
+    assert [(q["score"], q["mistakes"]) for q in chat["questions"]] == [
+        (4, True),
+        (8, True),
+        (10, False),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_save_answer_advances_cursor_once(real_mongo):
+    chat_id = await _chat_with_questions(real_mongo)
+
+    await save_answer(real_mongo, chat_id, 1, "2", "первый")
+    await save_answer(real_mongo, chat_id, 1, "2", "второй")
+    # позиция не совпала с question_id — запись пропускается
+    await save_answer(real_mongo, chat_id, 2, "1", "мимо")
+
+    current = await get_chat_question(real_mongo, chat_id, "u")
+    assert current["question"]["question_id"] == "3"
+
+    chat = await get_chat(real_mongo, chat_id, "u")
+    assert [q.get("answer") for q in chat["questions"]] == [None, "второй", None]
+
+
+@pytest.mark.asyncio
+async def test_question_migration_sets_cursor(real_mongo):
+    result = await real_mongo.chats.insert_one({
+        "user_id": "u",
+        "created_at": datetime.utcnow(),
+        "current_question_index": 0,
+        "questions": [
+            {"question_id": "1", "text": "Q1", "used": False, "score": None, "mistakes": True},
+            {"question_id": "2", "text": "Q2", "used": True, "score": 10, "mistakes": False},
+            {"question_id": "3", "text": "Q3", "used": False, "score": None, "mistakes": False},
+        ],
+    })
+
+    assert await migrate_questions.migrate(real_mongo) == 1
+    assert await migrate_questions.migrate(real_mongo) == 0
+
+    chat = await get_chat(real_mongo, str(result.inserted_id), "u")
+    assert [q["question_id"] for q in chat["questions"]] == ["2", "1", "3"]
+    assert chat["question_positions"] == {"2": 0, "1": 1, "3": 2}
+    assert chat["current_question_index"] == 1
+
+
+@pytest.mark.asyncio
+async def test_commit_turn_rejects_stale_version(real_mongo):
+    # чат без поля version, как до миграции
+    result = await real_mongo.chats.insert_one({"user_id": "u", "created_at": datetime.utcnow()})
+    chat_id = str(result.inserted_id)
+
+    turn = [new_message("user", "q"), new_message("assistant", "a")]
+    update = llm_context_update([1, 2], "m", 2)
+
+    assert await commit_turn(real_mongo, chat_id, 0, turn, update) is True
+    # повторная отправка с той же прочитанной версией
+    assert await commit_turn(real_mongo, chat_id, 0, turn, update) is False
+
+    transcript = await get_transcript(real_mongo, chat_id, "u")
+    assert transcript["version"] == 1
+    assert transcript["llm_context_messages"] == 2
+    assert [m["content"] for m in transcript["messages"]] == ["q", "a"]
+
+
+@pytest.mark.asyncio
+async def test_list_chats_pages_by_created_at_and_id(real_mongo):
+    now = datetime.utcnow()
+    # одинаковое время создания — порядок решает _id
+    await real_mongo.chats.insert_many([
+        {"user_id": "u", "vacancy_title": f"v{i}", "created_at": now, "finished": False}
+        for i in range(5)
+    ])
+
+    titles = []
+    page, cursor = await list_chats(real_mongo, "u", limit=2)
+    titles += [c["title"] for c in page]
+    while cursor:
+        page, cursor = await list_chats(real_mongo, "u", cursor, limit=2)
+        titles += [c["title"] for c in page]
+
+    assert titles == ["v4", "v3", "v2", "v1", "v0"]
+
+
+@pytest.mark.asyncio
+async def test_iter_chats_streams_history(real_mongo):
+    result = await real_mongo.chats.insert_one(
+        {"user_id": "u", "vacancy_title": "Python", "created_at": datetime.utcnow()}
+    )
+    await append_message(real_mongo, str(result.inserted_id), "user", "hi")
+
+    chats = [chat async for chat in iter_chats(real_mongo, "u", batch_size=1)]
+
+    assert [c["title"] for c in chats] == ["Python"]
+    assert [m["content"] for m in chats[0]["messages"]] == ["hi"]
@@ -1,5 +1,6 @@
 import pytest
 from app.chat.utils import (
+    arrange_questions,
     get_current_question,
     mark_question_used,
     apply_evaluation,
@@ -27,14 +28,49 @@ def test_mark_question_used():
 
 def test_apply_evaluation():
     questions = [
-        {"text": "Q1", "score": None, "mistakes": False},
+        {"question_id": "1", "text": "Q1", "score": None, "mistakes": False},
+        {"question_id": "2", "text": "Q1", "score": None, "mistakes": False},
     ]
 
     evaluation = [
-        {"question": "Q1", "score": 4},
+        {"question_id": "2", "question": "Q1", "score": 4},
     ]
 
     apply_evaluation(questions, evaluation)
 
+    assert questions[0]["score"] is None
+    assert questions[1]["score"] == 4
+    assert questions[1]["mistakes"] is True
+
+def test_apply_evaluation_without_id_matches_text():
+    questions = [
+        {"question_id": "1", "text": "Q1", "score": None, "mistakes": False},
+    ]
+
+    apply_evaluation(questions, [{"question": "Q1", "score": 4}])
+
     assert questions[0]["score"] == 4
-    assert questions[0]["mistakes"] is True
\ No newline at end of file
+    assert questions[0]["mistakes"] is True
+
+def test_current_question_from_cursor():
+    questions = [
+        {"question_id": "1", "used": True},
+        {"question_id": "2", "used": False},
+        {"question_id": "3", "used": False},
+    ]
+
+    assert get_current_question(questions, 2)["question_id"] == "3"
+    assert get_current_question(questions, 2)["index"] == 2
+    assert get_current_question(questions, 3) is None
+
+def test_arrange_questions_puts_asked_first():
+    questions = [
+        {"question_id": "1", "used": False},
+        {"question_id": "2", "used": True},
+        {"question_id": "3", "used": False},
+    ]
+
+    arranged, cursor = arrange_questions(questions)
+
+    assert [q["question_id"] for q in arranged] == ["2", "1", "3"]
+    assert cursor == 1
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app.chat.greetings import GREETING_POOL_REQUESTS, GreetingPool
+
+
+def make_pool(size=3, low_watermark=1):
+    counter = itertools.count()
+
+    async def generate(title):
+        return f"{title} #{next(counter)}"
+
+    return GreetingPool(size=size, low_watermark=low_watermark, generate=generate)
+
+
+def hits(result):
+    return GREETING_POOL_REQUESTS.labels(result)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_miss_triggers_refill_then_hits_rotate():
+    pool = make_pool()
+    misses = hits("miss")
+
+    assert pool.take("Python") is None
+    assert hits("miss") == misses + 1
+
+    await asyncio.sleep(0)
+    await pool._refills["Python"]
+    assert pool.available("Python") == 3
+
+    served = [pool.take("Python") for _ in range(2)]
+    assert served == ["Python #0", "Python #1"]
+
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_refill_below_watermark_and_skips_duplicates():
+    async def same(title):
+        return "одно и то же"
+
+    pool = GreetingPool(size=3, low_watermark=1, generate=same)
+    pool.refill("Go")
+    await pool._refills["Go"]
+
+    # одинаковые варианты не копятся
+    assert pool.available("Go") == 1
+
+    pool.take("Go")
+    assert "Go" in pool._refills
+    await pool.aclose()
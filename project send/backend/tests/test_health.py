@@ -3,4 +3,10 @@ import pytest
 @pytest.mark.asyncio
 async def test_app_starts(client):
     r = await client.get("/")
-    assert r.status_code in (200, 404)
\ No newline at end of file
+    assert r.status_code in (200, 404)
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    r = await client.get("/metrics")
+    assert r.status_code == 200
+    assert "llm_request_seconds" in r.text
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.db.indexes import ensure_indexes
+from app.jobs.queue import DONE, FAILED, QUEUED, enqueue, get_job
+from app.jobs.worker import JobWorker
+
+
+@pytest.mark.asyncio
+async def test_enqueue_dedupes_active_job(real_mongo):
+    first = await enqueue(real_mongo, "echo", {"x": 1}, user_id="u", dedupe_key="k")
+    second = await enqueue(real_mongo, "echo", {"x": 1}, user_id="u", dedupe_key="k")
+
+    assert first["_id"] == second["_id"]
+    assert await get_job(real_mongo, str(first["_id"]), "other") is None
+
+
+@pytest.mark.asyncio
+async def test_worker_completes_job(real_mongo):
+    async def echo(mongo, payload):
+        return payload["x"] * 2
+
+    job = await enqueue(real_mongo, "echo", {"x": 21}, user_id="u")
+    worker = JobWorker(real_mongo, {"echo": echo})
+
+    assert await worker.run_once() is True
+    assert await worker.run_once() is False
+
+    done = await get_job(real_mongo, str(job["_id"]), "u")
+    assert done["status"] == DONE
+    assert done["result"] == 42
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_then_fails(real_mongo):
+    calls = []
+
+    async def broken(mongo, payload):
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    job = await enqueue(real_mongo, "broken", {}, max_attempts=2)
+    worker = JobWorker(real_mongo, {"broken": broken}, backoff_seconds=0)
+
+    await worker.run_once()
+    assert (await get_job(real_mongo, str(job["_id"])))["status"] == QUEUED
+
+    await worker.run_once()
+    failed = await get_job(real_mongo, str(job["_id"]))
+    assert failed["status"] == FAILED
+    assert failed["attempts"] == 2
+    assert "boom" in failed["error"]
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_enqueue_race_returns_existing_job(real_mongo):
+    await ensure_indexes(real_mongo)
+
+    jobs = await asyncio.gather(*[
+        enqueue(real_mongo, "echo", {}, dedupe_key="race") for _ in range(5)
+    ])
+
+    assert len({job["_id"] for job in jobs}) == 1
+    assert await real_mongo.jobs.count_documents({"dedupe_key": "race"}) == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_renews_lease_while_running(real_mongo):
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(mongo, payload):
+        started.set()
+        await release.wait()
+        return "ok"
+
+    job = await enqueue(real_mongo, "slow", {})
+    worker = JobWorker(real_mongo, {"slow": slow}, lease_seconds=0.3)
+
+    run = asyncio.create_task(worker.run_once())
+    await started.wait()
+    first = (await real_mongo.jobs.find_one({"_id": job["_id"]}))["locked_until"]
+    await asyncio.sleep(0.25)
+    renewed = (await real_mongo.jobs.find_one({"_id": job["_id"]}))["locked_until"]
+
+    # аренда продлена — повторный claim задачу не получит
+    assert renewed > first
+    assert await JobWorker(real_mongo, {}, lease_seconds=0.3).run_once() is False
+
+    release.set()
+    await run
+    assert (await get_job(real_mongo, str(job["_id"])))["status"] == DONE
@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.config import settings
+from app.llm.client import qwen_client
+from app import main
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_llm_client_reopens_after_close():
+    await qwen_client.aclose()
+    assert qwen_client.client.is_closed
+
+    qwen_client.start()
+    assert not qwen_client.client.is_closed
+
+
+class FakeWorker:
+    def start(self):
+        self.started = True
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.mark.asyncio
+async def test_lifespan_closes_pools(monkeypatch):
+    # общий клиент Mongo после close() не переоткрыть — закрытия подменяем
+    closed = []
+    worker = FakeWorker()
+
+    async def noop(*args):
+        pass
+
+    async def fake_close_postgres():
+        closed.append("postgres")
+
+    async def fake_aclose():
+        closed.append("llm")
+
+    monkeypatch.setattr(main, "bootstrap_indexes", noop)
+    monkeypatch.setattr(main, "warm_question_bank", noop)
+    monkeypatch.setattr(main, "warm_vacancies", noop)
+    monkeypatch.setattr(main, "make_worker", lambda *args: worker)
+    monkeypatch.setattr(main, "close_mongo", lambda: closed.append("mongo"))
+    monkeypatch.setattr(main, "close_postgres", fake_close_postgres)
+    monkeypatch.setattr(main.qwen_client, "aclose", fake_aclose)
+
+    async with app.router.lifespan_context(app):
+        assert worker.started
+
+    assert worker.stopped
+    assert closed == ["llm", "mongo", "postgres"]
+
+
+def test_llm_client_uses_split_timeouts():
+    timeout = qwen_client.client.timeout
+
+    assert timeout.connect == settings.LLM_CONNECT_TIMEOUT
+    assert timeout.read == settings.LLM_READ_TIMEOUT
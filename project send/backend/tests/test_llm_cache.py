@@ -0,0 +1,64 @@
+import pytest
+
+from app.llm.cache import LLMCache
+from app.llm.client import prompt_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**kwargs):
+    params = {"max_entries": 10, "max_bytes": 1000, "ttl_seconds": 60}
+    params.update(kwargs)
+    return LLMCache(**params)
+
+
+def test_prompt_key_depends_on_all_parts():
+    base = prompt_key("m", "p", 0.3)
+
+    assert base == prompt_key("m", "p", 0.3)
+    assert base != prompt_key("m2", "p", 0.3)
+    assert base != prompt_key("m", "p2", 0.3)
+    assert base != prompt_key("m", "p", 0.7)
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_by_entries():
+    cache = make_cache(max_entries=2)
+
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    assert await cache.get("a") == "1"  # a теперь самый свежий
+    await cache.set("c", "3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert await cache.get("c") == "3"
+
+
+@pytest.mark.asyncio
+async def test_eviction_by_size():
+    cache = make_cache(max_bytes=10)
+
+    await cache.set("a", "x" * 6)
+    await cache.set("b", "y" * 6)
+
+    assert await cache.get("a") is None
+    assert await cache.get("b") == "y" * 6
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry():
+    clock = FakeClock()
+    cache = make_cache(clock=clock)
+
+    await cache.set("a", "1")
+    clock.now = 59
+    assert await cache.get("a") == "1"
+    clock.now = 61
+    assert await cache.get("a") is None
@@ -0,0 +1,70 @@
+import pytest
+
+from app.chat.schemas import AnswerScore, EvaluationItem
+from app.llm.client import OllamaClient
+from app.llm.json_stream import JsonArrayExtractor, parse_object, stream_array
+
+RAW = (
+    "Вот оценка:\n```json\n[\n"
+    ' {"question": "a, [b]", "score": 5, "feedback": "x \\" ]"},\n'
+    ' {"question": "c", "score": oops},\n'
+    ' {"question": "d", "score": 9}\n'
+    "]\n```\nУдачи!"
+)
+
+
+@pytest.mark.parametrize("step", [1, 7, len(RAW)])
+def test_extractor_skips_prose_and_broken_items(step):
+    extractor = JsonArrayExtractor()
+    items = []
+    for i in range(0, len(RAW), step):
+        items += list(extractor.feed(RAW[i:i + step]))
+
+    assert [item["question"] for item in items] == ["a, [b]", "d"]
+    assert items[0]["feedback"] == 'x " ]'
+    assert extractor.done
+
+
+async def chunks(text, closed, size=4):
+    try:
+        for i in range(0, len(text), size):
+            yield {"response": text[i:i + size], "done": False}
+    finally:
+        closed.append(True)
+
+
+@pytest.mark.asyncio
+async def test_stream_array_validates_and_stops_early():
+    closed = []
+    text = 'см. [1]\n[{"question": "q", "score": 11}, {"question": "q2", "score": 3}] и дальше'
+
+    items = [i async for i in stream_array(chunks(text, closed), EvaluationItem)]
+
+    assert [(i.question, i.score) for i in items] == [("q2", 3)]
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_stream_array_salvages_truncated_output():
+    closed = []
+    text = '[{"question": "q", "score": 4, "feedback": ""}, {"question": "q2", "sco'
+
+    items = [i async for i in stream_array(chunks(text, closed), EvaluationItem)]
+
+    assert [i.question for i in items] == ["q"]
+
+
+def test_parse_object():
+    assert parse_object('```json\n{"score": 7}\n```', AnswerScore).score == 7
+
+    with pytest.raises(ValueError):
+        parse_object("(модель не ответила)", AnswerScore)
+
+
+def test_payload_passes_format():
+    client = OllamaClient()
+
+    payload = client._payload("p", False, format={"type": "array"})
+
+    assert payload["format"] == {"type": "array"}
+    assert "format" not in client._payload("p", False)
@@ -0,0 +1,176 @@
+import json
+
+import httpx
+import pytest
+
+from app.llm.client import OllamaClient
+from app.llm.pool import Backend, LLMPool, NoHealthyBackend, parse_backends
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_servers(handlers):
+    # один MockTransport изображает несколько узлов, различая их по хосту
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        return handlers[request.url.host](request)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+def ollama_ok(text):
+    return lambda request: httpx.Response(200, json={"response": text, "done": True})
+
+
+def down(request):
+    return httpx.Response(502, text="bad gateway")
+
+
+def make_client(spec, handlers, **pool_kwargs):
+    pool = LLMPool(parse_backends(spec), **pool_kwargs)
+    llm = OllamaClient(pool=pool)
+    llm.client, calls = fake_servers(handlers)
+    return llm, calls
+
+
+def test_parse_backends():
+    backends = parse_backends("http://a:11434, openai=http://b:8000/")
+
+    assert [(b.kind, b.url) for b in backends] == [
+        ("ollama", "http://a:11434"),
+        ("openai", "http://b:8000"),
+    ]
+    with pytest.raises(ValueError):
+        parse_backends("grpc=http://c")
+
+
+def test_least_outstanding_pick():
+    a, b = Backend("http://a"), Backend("http://b")
+    a.outstanding = 2
+    pool = LLMPool([a, b])
+
+    assert pool.pick() is b
+
+
+def test_ewma_pick_prefers_fast_backend():
+    a, b = Backend("http://a"), Backend("http://b")
+    pool = LLMPool([a, b], strategy="ewma")
+    pool.record_success(a, 2.0)
+    pool.record_success(b, 0.5)
+
+    assert pool.pick() is b
+
+
+@pytest.mark.asyncio
+async def test_retry_on_other_backend():
+    llm, calls = make_client(
+        "http://a,http://b",
+        {"a": down, "b": ollama_ok("ok")},
+    )
+
+    assert await llm.generate("p") == "ok"
+    assert calls == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    llm, calls = make_client(
+        "http://a,http://b",
+        {"a": lambda r: httpx.Response(400), "b": ollama_ok("ok")},
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await llm.generate("p")
+    assert calls == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_ejects_and_restores_backend():
+    clock = FakeClock()
+    backend = Backend("http://a")
+    pool = LLMPool([backend], failure_threshold=2, cooldown_seconds=10, clock=clock)
+
+    async def fail(b):
+        raise httpx.ConnectError("refused")
+
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await pool.call(fail)
+
+    with pytest.raises(NoHealthyBackend):
+        pool.pick()
+
+    clock.now = 11
+
+    async def ok(b):
+        return "ok"
+
+    assert await pool.call(ok) == "ok"
+    assert backend.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_openai_backend():
+    def openai(request):
+        body = json.loads(request.content)
+        assert request.url.path == "/v1/completions"
+        assert body["temperature"] == 0.3
+        return httpx.Response(200, json={"choices": [{"text": "hi"}]})
+
+    llm, _ = make_client("openai=http://b", {"b": openai})
+
+    data = await llm.generate_raw("p", temperature=0.3)
+
+    assert data["response"] == "hi"
+
+
+@pytest.mark.asyncio
+async def test_context_requests_only_go_to_ollama():
+    llm, calls = make_client(
+        "openai=http://b,http://a",
+        {"a": ollama_ok("ok"), "b": down},
+    )
+
+    await llm.generate_raw("p", context=[1, 2])
+
+    assert calls == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_chunk():
+    body = json.dumps({"response": "x", "done": True})
+    llm, calls = make_client(
+        "http://a,http://b",
+        {"a": down, "b": lambda r: httpx.Response(200, text=body)},
+    )
+
+    chunks = [c async for c in llm.stream("p")]
+
+    assert chunks == [{"response": "x", "done": True}]
+    assert calls == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_openai_stream():
+    body = "\n".join([
+        'data: {"choices": [{"text": "a"}]}',
+        'data: {"choices": [{"text": "b"}]}',
+        "data: [DONE]",
+    ])
+    llm, _ = make_client(
+        "openai=http://b",
+        {"b": lambda r: httpx.Response(200, text=body)},
+    )
+
+    chunks = [c async for c in llm.stream("p")]
+
+    assert "".join(c["response"] for c in chunks) == "ab"
+    assert chunks[-1]["done"] is True
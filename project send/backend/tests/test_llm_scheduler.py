@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.llm.scheduler import LLMScheduler, Priority, SchedulerOverloaded
+
+
+async def queued(scheduler, order, name, priority, user_id=None):
+    async with scheduler.slot(priority, user_id):
+        order.append(name)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=10, retry_after=1)
+    order = []
+
+    await scheduler.acquire()
+    tasks = [
+        asyncio.create_task(queued(scheduler, order, "batch", Priority.BATCH)),
+        asyncio.create_task(queued(scheduler, order, "eval", Priority.EVALUATION)),
+        asyncio.create_task(queued(scheduler, order, "chat", Priority.INTERACTIVE)),
+    ]
+    await settle()
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["chat", "eval", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_user_fairness_within_priority():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=10, retry_after=1)
+    order = []
+
+    await scheduler.acquire()
+    tasks = [
+        asyncio.create_task(queued(scheduler, order, f"a{i}", Priority.ASSIST, "a"))
+        for i in range(3)
+    ]
+    await settle()
+    tasks.append(
+        asyncio.create_task(queued(scheduler, order, "b0", Priority.ASSIST, "b"))
+    )
+    await settle()
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    assert order.index("b0") < order.index("a1")
+
+
+@pytest.mark.asyncio
+async def test_sheds_when_queue_is_full():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=1, retry_after=7)
+
+    await scheduler.acquire()
+    waiter = asyncio.create_task(scheduler.acquire())
+    await settle()
+
+    with pytest.raises(SchedulerOverloaded) as exc:
+        await scheduler.acquire()
+    assert exc.value.retry_after == 7
+
+    waiter.cancel()
+    await settle()
+    assert scheduler.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=10, retry_after=1)
+
+    await scheduler.acquire()
+    waiter = asyncio.create_task(scheduler.acquire())
+    await settle()
+    waiter.cancel()
+    await settle()
+    scheduler.release()
+
+    assert scheduler.in_flight == 0
+    await asyncio.wait_for(scheduler.acquire(), 1)
+    assert scheduler.in_flight == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.llm.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "ok"
+
+    tasks = [asyncio.create_task(flights.do("k", upstream)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["ok"] * 5
+    assert calls == 1
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight()
+
+    async def boom():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        await flights.do("k", boom)
+
+    async def fine():
+        return 1
+
+    assert await flights.do("k", fine) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_the_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def upstream():
+        await release.wait()
+        return "ok"
+
+    first = asyncio.create_task(flights.do("k", upstream))
+    second = asyncio.create_task(flights.do("k", upstream))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "ok"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancel_stops_upstream():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def upstream():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flights.do("k", upstream))
+    await asyncio.sleep(0)
+    waiter.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flights.in_flight() == 0
@@ -0,0 +1,35 @@
+from prometheus_client import REGISTRY
+
+from app.llm.telemetry import record_call
+
+
+def sample(name, tag):
+    return REGISTRY.get_sample_value(name, {"tag": tag}) or 0
+
+
+def test_record_call_observes_ollama_metrics():
+    before = sample("llm_output_tokens_sum", "test")
+
+    record_call(
+        "test",
+        latency=1.5,
+        queue_wait=0.1,
+        data={
+            "prompt_eval_count": 100,
+            "prompt_eval_duration": 200_000_000,
+            "eval_count": 50,
+            "eval_duration": 2_000_000_000,
+            "load_duration": 10_000_000,
+        },
+    )
+
+    assert sample("llm_output_tokens_sum", "test") == before + 50
+    assert sample("llm_tokens_per_second_count", "test") >= 1
+    assert sample("llm_request_seconds_count", "test") >= 1
+
+
+def test_record_call_tolerates_missing_fields():
+    record_call("test_partial", latency=0.2, queue_wait=0.0, data={"response": "x"})
+
+    assert sample("llm_request_seconds_count", "test_partial") == 1
+    assert sample("llm_output_tokens_count", "test_partial") == 0
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.db.indexes import INDEXES, ensure_indexes, index_report
+
+
+def plan_stages(plan: dict) -> set[str]:
+    stages = {plan.get("stage")}
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages |= plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages |= plan_stages(child)
+    return stages
+
+
+def winning_stages(explain: dict) -> set[str]:
+    planner = explain.get("queryPlanner") or explain["stages"][0]["$cursor"]["queryPlanner"]
+    return plan_stages(planner["winningPlan"])
+
+
+def test_indexes_have_names():
+    for models in INDEXES.values():
+        for model in models:
+            assert model.document.get("name")
+
+
+@pytest.mark.asyncio
+async def test_chat_queries_do_not_collscan(real_mongo):
+    user_id = "u1"
+    now = datetime.utcnow()
+    await real_mongo.chats.insert_many([
+        {"user_id": f"u{i % 50}", "created_at": now - timedelta(minutes=i)}
+        for i in range(500)
+    ])
+    await ensure_indexes(real_mongo)
+
+    start = now - timedelta(days=1)
+    commands = [
+        # new_chat: дневной лимит
+        {"count": "chats", "query": {"user_id": user_id, "created_at": {"$gte": start, "$lt": now}}},
+        # list_chats
+        {"find": "chats", "filter": {"user_id": user_id}, "sort": {"created_at": -1, "_id": -1}},
+        # get_chat
+        {"find": "chats", "filter": {"_id": ObjectId(), "user_id": user_id}},
+        # clear_chats
+        {"delete": "chats", "deletes": [{"q": {"user_id": user_id}, "limit": 0}]},
+        # переписка чата
+        {"find": "messages", "filter": {"chat_id": ObjectId()}, "sort": {"timestamp": 1, "_id": 1}},
+    ]
+
+    for command in commands:
+        explain = await real_mongo.command({"explain": command, "verbosity": "queryPlanner"})
+        assert "COLLSCAN" not in winning_stages(explain), command
+
+
+@pytest.mark.asyncio
+async def test_index_report(real_mongo):
+    await ensure_indexes(real_mongo)
+    await ensure_indexes(real_mongo)  # повторный вызов ничего не ломает
+
+    report = await index_report(real_mongo)
+
+    assert report["chats"]["missing"] == []
+    # статистика только что начата — о неиспользуемых индексах рано судить
+    assert report["chats"]["unused"] == []
+
+    report = await index_report(real_mongo, unused_after=timedelta(0))
+    assert report["chats"]["unused"] == ["user_id_created_at_id"]
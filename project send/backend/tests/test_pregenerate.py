@@ -0,0 +1,75 @@
+import pytest
+
+from app.vacancies import pregenerate
+from app.vacancies.pregenerate import generate_questions, parse_questions
+
+
+def test_parse_questions_strips_numbering_and_dedupes():
+    raw = "1. Что такое GIL?\n2) что такое  GIL\n- Как работает asyncio?\n\n• Зачем нужен __slots__?"
+
+    assert parse_questions(raw) == [
+        "Что такое GIL?",
+        "Как работает asyncio?",
+        "Зачем нужен __slots__?",
+    ]
+
+
+def test_parse_questions_caps_bank_size():
+    raw = "\n".join(f"Вопрос {i}?" for i in range(40))
+
+    assert len(parse_questions(raw)) == pregenerate.MAX_GENERATED_QUESTIONS
+
+
+@pytest.mark.asyncio
+async def test_generate_questions_rejects_short_bank(monkeypatch):
+    async def fake_generate(prompt, **kwargs):
+        return "Один вопрос?"
+
+    monkeypatch.setattr(pregenerate.qwen_client, "generate", fake_generate)
+
+    with pytest.raises(ValueError):
+        await generate_questions("Python Developer")
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDB:
+    def __init__(self, vacancies):
+        self.vacancies = vacancies
+
+    async def execute(self, query):
+        return FakeResult(self.vacancies)
+
+
+@pytest.mark.asyncio
+async def test_pregenerate_continues_after_failed_vacancy(monkeypatch):
+    from types import SimpleNamespace
+
+    db = FakeDB([SimpleNamespace(title="Go Developer"), SimpleNamespace(title="Python Developer")])
+
+    async def fake_generate_questions(title):
+        if title == "Go Developer":
+            raise ValueError(f"LLM returned 1 questions for {title}")
+        return ["Что такое GIL?"]
+
+    async def fake_publish(db, vacancy, questions):
+        return 1
+
+    monkeypatch.setattr(pregenerate, "generate_questions", fake_generate_questions)
+    monkeypatch.setattr(pregenerate, "publish_questions", fake_publish)
+
+    result = await pregenerate.pregenerate(db)
+
+    assert result == {
+        "published": {"Python Developer": 1},
+        "failed": {"Go Developer": "LLM returned 1 questions for Go Developer"},
+    }
@@ -0,0 +1,85 @@
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.vacancies.question_bank import (
+    QuestionBank,
+    VacancyQuestions,
+    _invalidate_vacancy,
+    group_rows,
+    latest_questions_query,
+    question_bank,
+)
+from app.vacancies.questions_models import Question
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_set(title="Python", version=2):
+    return VacancyQuestions(
+        id=uuid.uuid4(),
+        title=title,
+        version=version,
+        questions=(("q1", "Что такое GIL?"),),
+    )
+
+
+def test_latest_questions_query_is_single_window_select():
+    sql = str(latest_questions_query("Python").compile(dialect=postgresql.dialect()))
+
+    assert "dense_rank() OVER (PARTITION BY questions.vacancy_id" in sql
+    assert "vacancies.title" in sql
+
+
+def test_group_rows():
+    vacancy_id = uuid.uuid4()
+    rows = [
+        SimpleNamespace(vacancy_id=vacancy_id, vacancy_title="Go", question_id=uuid.uuid4(), question=f"q{i}", version=3)
+        for i in range(2)
+    ]
+
+    [questions] = group_rows(rows)
+
+    assert (questions.title, questions.version) == ("Go", 3)
+    assert [text for _, text in questions.questions] == ["q0", "q1"]
+
+
+def test_questions_state_is_a_fresh_copy():
+    questions = make_set()
+
+    first = questions.questions_state()
+    first[0]["used"] = True
+
+    assert questions.questions_state()[0]["used"] is False
+
+
+def test_bank_ttl_and_invalidation():
+    clock = FakeClock()
+    bank = QuestionBank(ttl_seconds=10, clock=clock)
+    questions = make_set()
+
+    bank.put(questions)
+    assert bank.get("Python") is questions
+
+    bank.invalidate(questions.id)
+    assert bank.get("Python") is None
+
+    bank.put(questions)
+    clock.now = 11
+    assert bank.get("Python") is None
+
+
+def test_orm_insert_invalidates_vacancy():
+    questions = make_set()
+    question_bank.put(questions)
+
+    _invalidate_vacancy(None, None, Question(vacancy_id=questions.id, question="q", version=3))
+
+    assert question_bank.get("Python") is None
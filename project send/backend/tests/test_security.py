@@ -1,4 +1,15 @@
-from app.auth.security import hash_password, verify_password
+import pytest
+from passlib.context import CryptContext
+
+from app.auth import security
+from app.auth.security import (
+    PasswordHasherBusy,
+    hash_password,
+    hash_password_async,
+    verify_and_update_async,
+    verify_password,
+)
+
 
 def test_hash_and_verify_password():
     pwd = "Test12345"
@@ -6,4 +17,36 @@ def test_hash_and_verify_password():
 
     assert hashed != pwd
     assert verify_password(pwd, hashed)
-    assert not verify_password("wrong", hashed)
\ No newline at end of file
+    assert not verify_password("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify():
+    hashed = await hash_password_async("Test12345")
+
+    valid, new_hash = await verify_and_update_async("Test12345", hashed)
+    assert valid
+    assert new_hash is None
+
+    valid, _ = await verify_and_update_async("wrong", hashed)
+    assert not valid
+
+
+@pytest.mark.asyncio
+async def test_rehash_when_cost_changes():
+    weak = CryptContext(schemes=["argon2"], argon2__time_cost=1)
+    old_hash = weak.hash("Test12345")
+
+    valid, new_hash = await verify_and_update_async("Test12345", old_hash)
+
+    assert valid
+    assert new_hash is not None
+    assert verify_password("Test12345", new_hash)
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(security, "_pending", 10_000)
+
+    with pytest.raises(PasswordHasherBusy):
+        await hash_password_async("Test12345")
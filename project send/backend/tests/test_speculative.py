@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.chat import speculative
+from app.chat.speculative import Speculation, replay
+
+QUESTION = {"question_id": "1", "text": "Что такое GIL?", "used": False, "index": 0}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    saved = []
+    gate = asyncio.Event()
+
+    async def fake_answer(question, user_id=None, priority=None):
+        await gate.wait()
+        return f"answer: {question}"
+
+    async def fake_hint(question, context, user_id=None, priority=None):
+        return f"hint: {question}"
+
+    async def fake_save(mongo, chat_id, index, question_id, hint, model_answer):
+        saved.append((chat_id, question_id, hint, model_answer))
+        return True
+
+    monkeypatch.setattr(speculative, "generate_answer", fake_answer)
+    monkeypatch.setattr(speculative, "generate_hint", fake_hint)
+    monkeypatch.setattr(speculative, "save_speculation", fake_save)
+    return saved, gate
+
+
+@pytest.mark.asyncio
+async def test_precomputes_and_stores_on_question(fake_llm):
+    saved, gate = fake_llm
+    spec = Speculation(max_tasks=2, idle=lambda: True)
+
+    spec.schedule(None, "c1", QUESTION)
+    gate.set()
+    await asyncio.gather(*spec._tasks.values())
+
+    assert saved == [("c1", "1", "hint: Что такое GIL?", "answer: Что такое GIL?")]
+    assert spec.running == 0
+
+
+@pytest.mark.asyncio
+async def test_moving_on_cancels_previous_question(fake_llm):
+    saved, gate = fake_llm
+    spec = Speculation(max_tasks=2, idle=lambda: True)
+
+    spec.schedule(None, "c1", QUESTION)
+    first = spec._tasks["c1"]
+    spec.schedule(None, "c1", {**QUESTION, "question_id": "2"})
+    gate.set()
+    await asyncio.gather(*spec._tasks.values())
+
+    assert first.cancelled()
+    assert [s[1] for s in saved] == ["2"]
+
+
+@pytest.mark.asyncio
+async def test_budget_and_idle_gate(fake_llm):
+    saved, gate = fake_llm
+    idle = True
+    spec = Speculation(max_tasks=1, idle=lambda: idle)
+
+    spec.schedule(None, "c1", QUESTION)
+    spec.schedule(None, "c2", QUESTION)
+    assert list(spec._tasks) == ["c1"]
+
+    idle = False
+    await spec.aclose()
+    spec.schedule(None, "c3", QUESTION)
+    assert spec.running == 0
+
+    # уже заготовленный вопрос не пересчитывается
+    spec.idle = lambda: True
+    spec.schedule(None, "c4", {**QUESTION, "hint": "h", "model_answer": "a"})
+    assert spec.running == 0
+
+
+def test_disabled_does_nothing():
+    spec = Speculation(max_tasks=2, enabled=False, idle=lambda: True)
+    spec.schedule(None, "c1", QUESTION)
+    assert spec.running == 0
+
+
+@pytest.mark.asyncio
+async def test_replay_is_a_single_final_chunk():
+    assert [chunk async for chunk in replay("готово")] == [
+        {"response": "готово", "done": True}
+    ]
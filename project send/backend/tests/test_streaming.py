@@ -0,0 +1,84 @@
+import json
+
+import httpx
+import pytest
+
+from app.chat.streaming import sse_event, stream_reply
+from app.llm.client import OllamaClient
+
+
+def test_sse_event_format():
+    assert sse_event({"token": "hi"}) == 'data: {"token": "hi"}\n\n'
+    assert sse_event({"a": 1}, event="done") == 'event: done\ndata: {"a": 1}\n\n'
+
+
+async def fake_chunks(*tokens):
+    for t in tokens:
+        yield {"response": t, "done": False}
+    yield {"response": "", "done": True}
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_persists_after_stream():
+    saved = []
+    final_chunks = []
+
+    async def on_complete(text, final):
+        saved.append(text)
+        final_chunks.append(final)
+
+    events = [
+        e async for e in stream_reply(fake_chunks("При", "вет"), on_complete)
+    ]
+
+    assert saved == ["Привет"]
+    assert final_chunks == [{"response": "", "done": True}]
+    assert len(events) == 3
+    assert events[-1].startswith("event: done")
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_fallback():
+    saved = []
+
+    async def on_complete(text, final):
+        saved.append(text)
+
+    _ = [e async for e in stream_reply(fake_chunks(), on_complete, "fallback")]
+
+    assert saved == ["fallback"]
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_reports_conflict():
+    async def on_complete(text, final):
+        return False
+
+    events = [e async for e in stream_reply(fake_chunks("a"), on_complete)]
+
+    assert events[-1].startswith("event: error")
+    assert not any(e.startswith("event: done") for e in events)
+
+
+@pytest.mark.asyncio
+async def test_ollama_stream_parses_ndjson():
+    body = "\n".join(
+        json.dumps(c)
+        for c in [
+            {"response": "a", "done": False},
+            {"response": "b", "done": False},
+            {"response": "", "done": True, "eval_count": 2},
+        ]
+    )
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body)
+
+    llm = OllamaClient()
+    llm.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    chunks = [c async for c in llm.stream("prompt")]
+
+    assert [c["response"] for c in chunks] == ["a", "b", ""]
+    assert chunks[-1]["done"] is True
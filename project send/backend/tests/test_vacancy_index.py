@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+
+from app.chat import service
+from app.vacancies.index import VacancyIndex, normalize, vacancy_index
+
+TITLES = [
+    "Python Developer",
+    "Java Developer",
+    "Frontend Developer",
+    "Data Scientist",
+    "DevOps Engineer",
+    "Аналитик данных",
+    "Backend разработчик",
+]
+
+
+def make_index():
+    index = VacancyIndex(ttl_seconds=60)
+    index.build([(uuid.uuid4(), title) for title in TITLES])
+    return index
+
+
+def test_normalize():
+    assert normalize("Ёлка, Python-Developer!") == ["елка", "python", "developer"]
+
+
+@pytest.mark.parametrize("message, title", [
+    ("Хочу пройти собеседование на python developer", "Python Developer"),
+    ("на позицию аналитика данных", "Аналитик данных"),
+    ("I am a data scintist", "Data Scientist"),
+    ("java", "Java Developer"),
+])
+def test_confident_match(message, title):
+    assert make_index().match(message).title == title
+
+
+@pytest.mark.parametrize("message", ["developer", "хочу на питон", "frontend разработчик"])
+def test_ambiguous_message_is_left_to_llm(message):
+    assert make_index().match(message) is None
+
+
+def test_invalidate_marks_stale():
+    index = make_index()
+    assert not index.stale
+
+    index.invalidate()
+    assert index.stale
+
+
+@pytest.mark.asyncio
+async def test_detect_vacancy_asks_llm_only_among_candidates(monkeypatch):
+    prompts = []
+
+    async def fake_generate(prompt, **kwargs):
+        prompts.append(prompt)
+        return "Frontend Developer"
+
+    async def fresh(db):
+        pass
+
+    monkeypatch.setattr(vacancy_index, "entries", make_index().entries)
+    monkeypatch.setattr(vacancy_index, "ensure_fresh", fresh)
+    monkeypatch.setattr(service.qwen_client, "generate", fake_generate)
+
+    assert (await service.detect_vacancy("python developer", None)).title == "Python Developer"
+    assert prompts == []
+
+    assert (await service.detect_vacancy("frontend разработчик", None)).title == "Frontend Developer"
+    assert len(prompts) == 1
+    assert "Data Scientist" not in prompts[0]